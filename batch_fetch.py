@@ -0,0 +1,103 @@
+import io
+import random
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_export import write_export
+from fetch_engine import fetch_data, normalize_result
+
+# --- BATCH DOWNLOAD ---
+# Fans per-ticker fetches out over a bounded thread pool. Rate limiting happens per upstream
+# request in yahoo_client (one bucket for the whole process), so tickers served from the
+# store or cache cost nothing and concurrent batches share one budget.
+
+
+class NoDataError(Exception):
+    pass
+
+
+def parse_ticker_list(text):
+    if not text: return []
+    seen, tickers = set(), []
+    for tok in re.split(r'[\s,;]+', text):
+        tok = tok.strip().strip('"\'').upper()
+        if tok and tok not in seen: seen.add(tok); tickers.append(tok)
+    return tickers
+
+
+def read_ticker_file(file_bytes, file_name=""):
+    text = file_bytes.decode('utf-8', errors='ignore')
+    if file_name.lower().endswith('.csv'):
+        df = pd.read_csv(io.StringIO(text))
+        col = next((c for c in df.columns if str(c).strip().lower() in ('symbol', 'ticker', 'tickers', 'symbols')), None)
+        if col is None: return parse_ticker_list(text)  # Headerless list of symbols
+        return parse_ticker_list(" ".join(df[col].dropna().astype(str)))
+    return parse_ticker_list(text)
+
+
+def fetch_single(ticker, criteria):
+    data = fetch_data(dict(criteria, ticker=ticker))
+    if data is None or data.empty: raise NoDataError("No data returned")
+    return normalize_result(data, criteria)
+
+
+class BatchCancelled(Exception):
+    pass
+
+
+def _fetch_with_retry(ticker, max_retries, backoff_base, fetch_fn, cancel_event=None):
+    attempt = 0
+    while True:
+        if cancel_event is not None and cancel_event.is_set(): raise BatchCancelled("Cancelled")
+        try: return fetch_fn(ticker)
+        except NoDataError: raise  # Retrying won't conjure up data that isn't there
+        except Exception:
+            if attempt >= max_retries: raise
+            time.sleep(backoff_base * (2 ** attempt) + random.uniform(0, backoff_base))
+            attempt += 1
+
+
+def run_batch(tickers, criteria, max_workers=8, max_retries=3, backoff_base=1.0,
+              on_progress=None, on_result=None, cancel_event=None):
+    """Fetch every ticker with the shared criteria (see fetch_engine.resolve_criteria) and return
+    ({ticker: DataFrame}, {ticker: error message}). on_progress(done, total, ticker, error_or_None)
+    and on_result(ticker, DataFrame) are called from the calling thread. Setting cancel_event stops
+    the batch after the in-flight tickers and returns what finished so far."""
+    fetch_fn = lambda t: fetch_single(t, criteria)
+    results, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers) or 1))) as pool:
+        futures = {pool.submit(_fetch_with_retry, t, max_retries, backoff_base, fetch_fn, cancel_event): t for t in tickers}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                pool.shutdown(wait=False, cancel_futures=True); break
+            ticker, error = futures[fut], None
+            try: results[ticker] = fut.result()
+            except Exception as e: error = str(e) or e.__class__.__name__; failures[ticker] = error
+            else:
+                if on_result: on_result(ticker, results[ticker])
+            if on_progress: on_progress(done, len(tickers), ticker, error)
+    # Keep the caller's ticker order rather than completion order
+    return {t: results[t] for t in tickers if t in results}, {t: failures[t] for t in tickers if t in failures}
+
+
+def batch_to_long_frame(results):
+    frames = []
+    for ticker, df in results.items():
+        df = df.reset_index(); df.insert(0, "Ticker", ticker); frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def batch_to_zip_bytes(results, file_name_fn, failures=None, fmt="CSV"):
+    # file_name_fn(ticker) gives each member's name; members are streamed straight into the archive
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for ticker, df in results.items():
+            with zf.open(file_name_fn(ticker), "w") as member: write_export(df, fmt, member)
+        if failures:
+            zf.writestr("failed_tickers.csv", pd.DataFrame({"Ticker": list(failures), "Error": list(failures.values())}).to_csv(index=False))
+    return buf.getvalue()
+# --- END OF BATCH DOWNLOAD ---
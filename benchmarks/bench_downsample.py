@@ -0,0 +1,43 @@
+"""Time the chart downsamplers on multi-million-row series.
+
+    python benchmarks/bench_downsample.py [--rows 5000000] [--points 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chart_downsample import downsample_price, downsample_volume  # noqa: E402
+
+
+def _best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter(); fn(); timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10} {'lttb_s':>8} {'minmax_s':>9} {'volume_s':>9}")
+    for rows in args.rows:
+        idx = pd.date_range("1900-01-01", periods=rows, freq="min")
+        df = pd.DataFrame({"Close": 100 + rng.standard_normal(rows).cumsum(), "Volume": rng.integers(0, 10**6, rows)}, index=idx)
+        lttb = _best_of(lambda: downsample_price(df, "Close", args.points, method="lttb"), args.repeat)
+        minmax = _best_of(lambda: downsample_price(df, "Close", args.points, method="minmax"), args.repeat)
+        volume = _best_of(lambda: downsample_volume(df, "Volume", args.points), args.repeat)
+        print(f"{rows:>10,} {lttb:>8.3f} {minmax:>9.3f} {volume:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
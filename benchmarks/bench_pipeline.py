@@ -0,0 +1,168 @@
+"""Replay recorded Yahoo fixtures through the fetch, filter, resample and export paths, offline.
+
+    python benchmarks/bench_pipeline.py --save baseline.json
+    python benchmarks/bench_pipeline.py --baseline baseline.json  # exits 1 on a slowdown or a failed check
+    python benchmarks/record_fixtures.py AAPL MSFT SPY --start 2015-01-01   # re-record from Yahoo (network)
+
+Checks: a warm (store-backed) fetch must equal the cold one, and the weekly/monthly bars
+fetch_ohlcv builds must match the fixtures' 1wk/1mo reference bars. Those are Yahoo's own
+when recorded from Yahoo; the committed fixtures are synthetic with pandas reference bars,
+which the run reports as "Yahoo parity not verified".
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from corporate_actions import select_action_series, slice_date_range  # noqa: E402
+from data_export import EXPORT_FORMATS, write_export  # noqa: E402
+from indicators import INDICATORS, add_indicators  # noqa: E402
+from instrumentation import METRICS  # noqa: E402
+from ohlcv_resample import resample_ohlcv  # noqa: E402
+from ohlcv_store import fetch_ohlcv  # noqa: E402
+from record_fixtures import FIXTURE_DIR, fixture_path  # noqa: E402
+
+NOISE_FLOOR_SECONDS = 0.005  # Differences below this are timer noise, never a regression
+
+
+def load_fixtures(fixture_dir):
+    manifest_path = os.path.join(fixture_dir, "manifest.json")
+    if not os.path.exists(manifest_path): return None, {}
+    with open(manifest_path, "r", encoding="utf-8") as fh: manifest = json.load(fh)
+    fixtures = {}
+    for ticker in manifest["tickers"]:
+        fixtures[ticker] = {kind: pd.read_parquet(fixture_path(fixture_dir, ticker, kind))
+                            for kind in ("daily", "actions", "1wk", "1mo") if os.path.exists(fixture_path(fixture_dir, ticker, kind))}
+    return manifest, fixtures
+
+
+def replay_downloader(fixtures):
+    # Same contract as ohlcv_store._download_range: bars in [start, end), start None = inception
+    def download(ticker, start, end):
+        daily = fixtures[ticker]["daily"]
+        return daily.loc[start:end - pd.Timedelta(1, "ns")].copy()
+    return download
+
+
+def _best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter(); fn(); timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_cases(fixtures, repeat):
+    download = replay_downloader(fixtures)
+    tickers = list(fixtures)
+    results = {}
+
+    def fetch_all(store_dir, interval="1d"):
+        return {t: fetch_ohlcv(t, None, None, interval, store_dir=store_dir, downloader=download) for t in tickers}
+
+    def cold_fetch():
+        with tempfile.TemporaryDirectory() as store_dir: fetch_all(store_dir)
+    results["fetch_cold"] = _best_of(cold_fetch, repeat)
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        fetch_all(store_dir)
+        results["fetch_warm"] = _best_of(lambda: fetch_all(store_dir), repeat)
+        results["fetch_weekly"] = _best_of(lambda: fetch_all(store_dir, "1wk"), repeat)
+        results["fetch_monthly"] = _best_of(lambda: fetch_all(store_dir, "1mo"), repeat)
+
+    dailies = {t: f["daily"] for t, f in fixtures.items()}
+    windows = {t: ((df.index[-1] - pd.DateOffset(years=1)).strftime('%Y-%m-%d'), df.index[-1].strftime('%Y-%m-%d')) for t, df in dailies.items()}
+    results["filter_prices"] = _best_of(lambda: [slice_date_range(dailies[t], *windows[t]) for t in tickers], repeat)
+    results["filter_dividends"] = _best_of(
+        lambda: [slice_date_range(select_action_series(fixtures[t]["actions"], "2"), *windows[t]) for t in tickers if "actions" in fixtures[t]], repeat)
+    results["resample_weekly"] = _best_of(lambda: [resample_ohlcv(df, "1wk") for df in dailies.values()], repeat)
+    results["resample_monthly"] = _best_of(lambda: [resample_ohlcv(df, "1mo") for df in dailies.values()], repeat)
+    selections = [(name, {}) for name in INDICATORS]
+    results["indicators"] = _best_of(lambda: [add_indicators(df, selections) for df in dailies.values()], repeat)
+
+    long_frame = pd.concat([df.assign(Ticker=t) for t, df in dailies.items()])
+    for fmt in EXPORT_FORMATS:
+        results[f"export_{fmt}"] = _best_of(lambda: write_export(long_frame, fmt, io.BytesIO()), repeat)
+    return results
+
+
+def run_checks(fixtures, tolerance):
+    download = replay_downloader(fixtures)
+    failures = []
+    for ticker, frames in fixtures.items():
+        with tempfile.TemporaryDirectory() as store_dir:
+            cold = fetch_ohlcv(ticker, None, None, "1d", store_dir=store_dir, downloader=download)
+            warm = fetch_ohlcv(ticker, None, None, "1d", store_dir=store_dir, downloader=download)
+            if not cold.equals(warm): failures.append(f"{ticker}: warm fetch differs from cold fetch")
+            for interval in ("1wk", "1mo"):
+                if interval not in frames or frames[interval].empty:
+                    failures.append(f"{ticker} {interval}: no reference bars in the fixtures, resample parity not checked"); continue
+                ours, expected = fetch_ohlcv(ticker, None, None, interval, store_dir=store_dir, downloader=download), frames[interval]
+                # Edge bars can be partial (recording window, a bar still open when recorded)
+                lo, hi = max(ours.index[0], expected.index[0]), min(ours.index[-1], expected.index[-1])
+                ours, expected = ours.loc[lo:hi].iloc[1:-1], expected.loc[lo:hi].iloc[1:-1]
+                if not ours.index.equals(expected.index):
+                    failures.append(f"{ticker} {interval}: bar labels differ ({len(ours)} local vs {len(expected)} reference)"); continue
+                for col in ("Open", "High", "Low", "Close", "Volume"):
+                    a, b = ours[col].to_numpy(np.float64), expected[col].to_numpy(np.float64)
+                    rel = np.nanmax(np.abs(a - b) / np.maximum(np.abs(b), 1e-12)) if len(a) else 0.0
+                    if rel > tolerance: failures.append(f"{ticker} {interval} {col}: max relative diff {rel:.2e} over {len(a)} bars")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Write timings to this JSON file")
+    parser.add_argument("--baseline", help="Compare timings against a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--check-tolerance", type=float, default=1e-4, help="Allowed relative diff vs Yahoo's 1wk/1mo bars")
+    parser.add_argument("--prometheus", help="Write per-stage metrics of the whole run in Prometheus text format")
+    args = parser.parse_args(argv)
+
+    manifest, fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"error: no fixtures in {args.fixtures}; run benchmarks/record_fixtures.py first", file=sys.stderr); return 2
+    rows = sum(len(f["daily"]) for f in fixtures.values())
+    print(f"{len(fixtures)} ticker(s), {rows:,} daily bars ({manifest['source']} fixtures, recorded {manifest['recorded_at']})")
+
+    METRICS.reset()
+    results = run_cases(fixtures, args.repeat)
+    failures = run_checks(fixtures, args.check_tolerance)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh: baseline = json.load(fh)["results"]
+    regressions = []
+    print(f"{'case':<24} {'best_s':>9} {'baseline_s':>11} {'change':>8}")
+    for case, seconds in results.items():
+        base = baseline.get(case)
+        base_text, change = (f"{base:.4f}", f"{seconds / base - 1:+.0%}") if base else ("", "")
+        print(f"{case:<24} {seconds:>9.4f} {base_text:>11} {change:>8}")
+        if base and seconds > base * (1 + args.tolerance) and seconds - base > NOISE_FLOOR_SECONDS: regressions.append(case)
+
+    print("\nPer-stage totals over the whole run:")
+    print(METRICS.totals_frame().round({"seconds": 4, "max_seconds": 4, "avg_ms": 2}).to_string())
+    if args.prometheus:
+        with open(args.prometheus, "w", encoding="utf-8") as fh: fh.write(METRICS.prometheus_text())
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"fixture_source": manifest["source"], "tickers": list(fixtures), "repeat": args.repeat, "results": results}, fh, indent=2)
+
+    if manifest.get("reference_bars") != "yahoo":
+        print(f"WARNING: Yahoo parity not verified: {manifest['source']} fixtures with {manifest.get('reference_bars')} reference bars; "
+              "re-record them from Yahoo with benchmarks/record_fixtures.py", file=sys.stderr)
+    for failure in failures: print(f"CHECK FAILED: {failure}", file=sys.stderr)
+    if regressions: print(f"REGRESSION (> {args.tolerance:.0%} slower): {', '.join(regressions)}", file=sys.stderr)
+    return 1 if failures or regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Record Yahoo responses as local fixtures for bench_pipeline.py to replay offline.
+
+    python benchmarks/record_fixtures.py AAPL MSFT SPY            # needs network access
+    python benchmarks/record_fixtures.py --synthetic AAA BBB      # deterministic stand-ins, no network
+    python benchmarks/record_fixtures.py AAPL KO --start 2023-01-01 --out-dir tests/fixtures
+
+Per ticker this writes the unadjusted daily download (exactly what the store's downloader
+returns), Yahoo's own auto-adjusted 1wk/1mo bars (to check local resampling against) and
+the corporate actions table. manifest.json records whether the set is real or synthetic;
+synthetic sets carry pandas-resampled 1wk/1mo reference bars instead of Yahoo's.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import corporate_actions  # noqa: E402
+import ohlcv_store  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(fixture_dir, ticker, kind):
+    return os.path.join(fixture_dir, f"{ticker}.{kind}.parquet")
+
+
+def record_ticker(ticker, start=None, end=None):
+    import yfinance as yf
+    end = pd.Timestamp(end) if end else pd.Timestamp.today().normalize()
+    start = pd.Timestamp(start) if start else None
+    frames = {"daily": ohlcv_store._download_range(ticker, start, end + pd.Timedelta(days=1)),
+              "actions": corporate_actions.slice_date_range(corporate_actions._download_actions(ticker), start, end)}
+    span = {"start": start.strftime('%Y-%m-%d')} if start is not None else {"period": "max"}
+    for interval in ("1wk", "1mo"):
+        raw = yf.download(ticker, end=(end + pd.Timedelta(days=1)).strftime('%Y-%m-%d'), interval=interval,
+                          auto_adjust=True, progress=False, timeout=20, **span)
+        frames[interval] = ohlcv_store.normalize_ohlcv_frame(raw)
+    return frames
+
+
+def reference_bars(daily, interval):
+    # Independent of ohlcv_resample: pandas' own calendar resampling, then the auto_adjust ratio of each bar's last day
+    rule = {"1wk": "W-MON", "1mo": "MS"}[interval]
+    bars = daily.resample(rule, label="left", closed="left").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Adj Close": "last", "Volume": "sum"})
+    bars = bars[bars["Close"].notna()]
+    ratio = bars["Adj Close"] / bars["Close"]
+    return pd.DataFrame({"Open": bars["Open"] * ratio, "High": bars["High"] * ratio, "Low": bars["Low"] * ratio,
+                         "Close": bars["Adj Close"], "Volume": bars["Volume"].astype(np.int64)}).rename_axis("Date")
+
+
+def synthesize_ticker(ticker, seed, start=None, end=None):
+    # Geometric random walk over US business days (federal holidays closed, so some weeks start on a
+    # Tuesday) with quarterly dividends; Adj Close is back-adjusted for them the way Yahoo does.
+    rng = np.random.default_rng(seed)
+    start, end = pd.Timestamp(start or "2000-01-03"), pd.Timestamp(end or "2024-12-31")
+    idx = pd.DatetimeIndex(pd.bdate_range(start, end, freq="C", holidays=USFederalHolidayCalendar().holidays(start, end)), name="Date")
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(idx))))
+    open_ = close * np.exp(rng.normal(0, 0.005, len(idx)))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, len(idx)))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, len(idx)))
+    dividends = pd.Series(0.0, index=idx)
+    dividends.iloc[40::63] = np.round(close[40::63] * 0.005, 4)
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    factor = 1 - dividends.to_numpy() / prev_close
+    adj_ratio = np.concatenate((np.cumprod(factor[::-1])[::-1][1:], [1.0]))
+    daily = pd.DataFrame({"Adj Close": close * adj_ratio, "Close": close, "High": high, "Low": low, "Open": open_,
+                          "Volume": rng.integers(10**5, 10**7, len(idx))}, index=idx)
+    # Yahoo sometimes pads an all-NaN price row onto a closed day; the resampler has to skip it
+    pad_day = next((d for d in USFederalHolidayCalendar().holidays(start, end) if d.weekday() == 0 and idx[0] < d < idx[-1]), None)
+    if pad_day is not None:
+        daily.loc[pad_day] = [np.nan] * 5 + [0]; daily = daily.sort_index()
+    actions = pd.DataFrame({"Dividends": dividends[dividends > 0], "Stock Splits": 0.0})
+    return {"daily": daily, "actions": actions, "1wk": reference_bars(daily, "1wk"), "1mo": reference_bars(daily, "1mo")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--out-dir", default=FIXTURE_DIR)
+    parser.add_argument("--synthetic", action="store_true", help="Generate deterministic fixtures instead of calling Yahoo")
+    parser.add_argument("--start", help="First day to record, YYYY-MM-DD (default: inception)")
+    parser.add_argument("--end", help="Last day to record, YYYY-MM-DD (default: today)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    recorded = []
+    for seed, ticker in enumerate(t.upper() for t in args.tickers):
+        frames = synthesize_ticker(ticker, seed, args.start, args.end) if args.synthetic else record_ticker(ticker, args.start, args.end)
+        if frames["daily"].empty:
+            print(f"{ticker}: no data, skipped", file=sys.stderr); continue
+        for kind, df in frames.items(): df.to_parquet(fixture_path(args.out_dir, ticker, kind))
+        recorded.append(ticker)
+        print(f"{ticker}: {len(frames['daily']):,} daily bars, {len(frames['actions'])} actions")
+    with open(os.path.join(args.out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump({"source": "synthetic" if args.synthetic else "yahoo", "reference_bars": "pandas" if args.synthetic else "yahoo",
+                   "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "tickers": recorded}, fh, indent=2)
+    return 0 if recorded else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
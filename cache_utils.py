@@ -0,0 +1,132 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# --- SHARED CACHES ---
+# Thread-safe in-process caches shared by the search and fetch helpers, and by
+# every Streamlit session served from this process.
+
+
+class TTLCache:
+    def __init__(self, maxsize=512, ttl_seconds=3600):
+        self.maxsize, self.ttl = maxsize, ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None: return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl: del self._data[key]; return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value); self._data.move_to_end(key)
+            while len(self._data) > self.maxsize: self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+
+def atomic_write(path, write_fn, mode="wb"):
+    """Write path via write_fn(fh) into a temp file unique to this writer, then rename it into place,
+    so concurrent writers (threads or processes) never interleave and readers never see half a file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as fh: write_fn(fh)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+
+def compact_frame(data):
+    """Lossless shrink of a fetched frame: whole-number float volumes become int64.
+    Prices stay float64; float32 would change the digits that end up in exported files."""
+    if not isinstance(data, pd.DataFrame) or data.empty or "Volume" not in data.columns: return data
+    values = data["Volume"].to_numpy()
+    if values.dtype.kind != "f" or np.isnan(values).any() or not np.array_equal(values, np.round(values)): return data
+    return data.assign(Volume=values.astype(np.int64))
+
+
+def _frame_nbytes(value):
+    if isinstance(value, pd.DataFrame): return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series): return int(value.memory_usage(deep=True))
+    if isinstance(value, (bytes, bytearray)): return len(value)  # Encoded exports
+    return 1024  # Rough flat cost for anything that isn't a frame
+
+
+class FrameCache:
+    """Process-wide, byte-budgeted LRU/TTL cache of fetched frames (and encoded exports) shared by every session.
+    Concurrent misses on one key are coalesced so only the first caller runs compute().
+    Cached values are shared objects: callers must copy before mutating them."""
+
+    def __init__(self, max_bytes, ttl_seconds=900):
+        self.max_bytes, self.ttl = max_bytes, ttl_seconds
+        self._data = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._inflight = {}  # key -> Future of the running compute
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    def _lookup(self, key):
+        item = self._data.get(key)
+        if item is None: return None
+        if time.monotonic() > item[0]:
+            self._bytes -= item[1]; del self._data[key]; self._stats["expired"] += 1
+            return None
+        self._data.move_to_end(key)
+        return item
+
+    def _store(self, key, value, ttl):
+        nbytes = _frame_nbytes(value)
+        if nbytes > self.max_bytes: return  # Would evict everything else; just don't cache it
+        old = self._data.pop(key, None)
+        if old is not None: self._bytes -= old[1]
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), nbytes, value); self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_bytes, _) = self._data.popitem(last=False)
+            self._bytes -= evicted_bytes; self._stats["evictions"] += 1
+
+    def get_or_compute(self, key, compute, should_cache=lambda value: True, ttl=None):
+        with self._lock:
+            item = self._lookup(key)
+            if item is not None: self._stats["hits"] += 1; return item[2]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader: future = self._inflight[key] = Future(); self._stats["misses"] += 1
+            else: self._stats["coalesced"] += 1
+        if not leader: return future.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock: self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if should_cache(value): self._store(key, value, ttl)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._data), bytes=self._bytes, max_bytes=self.max_bytes)
+
+    def clear(self):
+        with self._lock: self._data.clear(); self._bytes = 0
+
+
+DATA_CACHE = FrameCache(max_bytes=int(float(os.environ.get("STOCK_APP_CACHE_MB", "512")) * 1024 * 1024),
+                        ttl_seconds=int(os.environ.get("STOCK_APP_CACHE_TTL_SECONDS", "900")))
+# --- END OF SHARED CACHES ---
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# --- CHART DOWNSAMPLING ---
+# Keeps what a chart actually shows (peaks, troughs, trend) while cutting the number of
+# points sent to the browser to a few thousand, however long the underlying series is.
+
+MAX_CHART_POINTS = 2000
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the n_out points that best preserve the line's shape.
+    Bucket averages come from cumulative sums; only the (inherently sequential) anchor walk loops."""
+    n = len(x)
+    if n_out >= n or n_out < 3: return np.arange(n)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 interior buckets
+    starts, ends = edges[:-1], edges[1:]
+    next_starts, next_ends = ends, np.append(edges[2:], n)  # The last bucket looks ahead to the final point only
+    cx, cy = np.concatenate(([0.0], np.cumsum(x))), np.concatenate(([0.0], np.cumsum(y)))
+    counts = next_ends - next_starts
+    avg_x, avg_y = (cx[next_ends] - cx[next_starts]) / counts, (cy[next_ends] - cy[next_starts]) / counts
+
+    out = np.empty(n_out, dtype=np.int64); out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = starts[i], ends[i]
+        area = np.abs((x[a] - avg_x[i]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (avg_y[i] - y[a]))
+        a = s + int(np.argmax(area)); out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_buckets):
+    """Indices of the min and max of each of n_buckets equal buckets, fully vectorized."""
+    y = np.asarray(y, dtype=np.float64); n = len(y)
+    if 2 * n_buckets >= n: return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan); padded[:n] = y
+    grid = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(grid).all(axis=1)  # Trailing buckets can be pure padding
+    offsets = np.arange(n_buckets)[valid] * size
+    lo = offsets + np.nanargmin(grid[valid], axis=1); hi = offsets + np.nanargmax(grid[valid], axis=1)
+    return np.unique(np.concatenate((lo, hi)))
+
+
+def slice_window(df, start, end):
+    """Rows of a sorted DatetimeIndex frame within [start, end], located with searchsorted."""
+    values = df.index.values
+    lo = np.searchsorted(values, np.datetime64(pd.Timestamp(start)), side="left")
+    hi = np.searchsorted(values, np.datetime64(pd.Timestamp(end)), side="right")
+    return df.iloc[lo:hi]
+
+
+def downsample_price(df, column="Close", max_points=MAX_CHART_POINTS, method="lttb"):
+    series = df[column].dropna()
+    if len(series) <= max_points: return series
+    if method == "minmax": return series.iloc[minmax_indices(series.to_numpy(), max_points // 2)]
+    return series.iloc[lttb_indices(series.index.values.astype(np.int64), series.to_numpy(), max_points)]
+
+
+def downsample_volume(df, column="Volume", max_points=MAX_CHART_POINTS):
+    # Bars can't be thinned point-by-point without hiding spikes: keep each bucket's peak volume
+    series = df[column]
+    if len(series) <= max_points: return series
+    starts = np.linspace(0, len(series), max_points, endpoint=False).astype(np.int64)
+    return pd.Series(np.maximum.reduceat(series.to_numpy(), starts), index=series.index[starts], name=column)
+# --- END OF CHART DOWNSAMPLING ---
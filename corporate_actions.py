@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from cache_utils import DATA_CACHE
+from instrumentation import timed
+from yahoo_client import fetch_history
+
+# --- CORPORATE ACTIONS ---
+# Dividends, splits and capital gains all come back from a single history request
+# (the same data yf.Ticker.actions reads), so they are fetched and cached together per ticker.
+
+ACTION_COLUMNS = {"2": "Dividends", "3": "Stock Splits", "4": "Capital Gains"}  # data_type_code -> actions column
+ACTIONS_TTL_SECONDS = 6 * 3600
+
+
+@timed("actions_download")
+def _download_actions(ticker):
+    # Ticker.actions would hide a failed request behind an empty table; fetch_history raises so it can be retried
+    history = fetch_history(ticker, period="max", interval="1d", auto_adjust=False, actions=True, timeout=20)
+    actions = history[[c for c in ACTION_COLUMNS.values() if c in history.columns]]
+    if not actions.empty: actions = actions[(actions.to_numpy() != 0).any(axis=1)]  # Keep only dates with an action
+    if isinstance(actions.index, pd.DatetimeIndex):
+        if actions.index.tz is not None: actions = actions.tz_localize(None)
+        if not actions.index.is_monotonic_increasing: actions = actions.sort_index()
+        actions.index.name = "Date"
+    return actions
+
+
+def fetch_actions_table(ticker):
+    """All corporate actions for ticker as one frame (tz-naive, sorted index; one column per action type).
+    Shared across sessions through DATA_CACHE; treat the result as read-only."""
+    return DATA_CACHE.get_or_compute(("actions", ticker), lambda: _download_actions(ticker),
+                                     should_cache=lambda df: not df.empty, ttl=ACTIONS_TTL_SECONDS)
+
+
+def select_action_series(actions, data_type_code):
+    col = ACTION_COLUMNS[data_type_code]
+    if col not in actions.columns: return pd.Series(dtype=float, name=col)
+    series = actions[col]
+    return series[series.to_numpy() != 0]  # yfinance pads the other action types' dates with zeros
+
+
+@timed("date_filter")
+def slice_date_range(data, start_date_yf, end_date_yf):
+    """Rows of a sorted DatetimeIndex frame/series within [start_date_yf, end_date_yf] (inclusive days, None = open)."""
+    if data is None or data.empty or not isinstance(data.index, pd.DatetimeIndex): return data
+    idx = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    values = idx.values
+    lo = np.searchsorted(values, np.datetime64(pd.Timestamp(start_date_yf)), side="left") if start_date_yf else 0
+    hi = np.searchsorted(values, np.datetime64(pd.Timestamp(end_date_yf) + timedelta(days=1)), side="left") if end_date_yf else len(values)
+    return data.iloc[lo:hi]
+# --- END OF CORPORATE ACTIONS ---
@@ -0,0 +1,63 @@
+import gzip
+import io
+
+from cache_utils import DATA_CACHE
+from instrumentation import stage
+
+# --- DATA EXPORT ---
+# Serializers behind the download buttons and the CLI. Nothing is encoded until someone
+# actually asks for a file. Text formats are written in row chunks straight into the target
+# file, so a big frame never exists as one giant string. st.download_button needs the whole
+# file as bytes, so button exports are held in memory and cached inside DATA_CACHE's byte budget.
+
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Feather (Arrow)": (".feather", "application/vnd.apache.arrow.file"),
+}
+CSV_CHUNK_ROWS = 50_000
+EXPORT_CACHE_TTL_SECONDS = 1800
+EXPORT_CACHE_MAX_SHARE = 0.25  # One export may take at most this much of DATA_CACHE, so it can't flush the fetched frames
+
+
+def write_export(df, fmt, fh, index=True):
+    """Serialize df in the given EXPORT_FORMATS format into the binary file handle fh."""
+    if fmt not in EXPORT_FORMATS: raise ValueError(f"Unknown export format: {fmt}")
+    start_pos = _tell(fh)
+    with stage("export", format=fmt) as rec:
+        if fmt in ("CSV", "CSV (gzip)"):
+            out = gzip.GzipFile(fileobj=fh, mode="wb", compresslevel=6, mtime=0) if fmt == "CSV (gzip)" else fh
+            text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+            for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+                df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(text, index=index, header=(start == 0))
+            text.flush(); text.detach()
+            if out is not fh: out.close()
+        elif fmt == "Parquet":
+            df.to_parquet(fh, index=index)
+        else:
+            # Feather can't hold an index, so it travels as an ordinary first column
+            (df.reset_index() if index else df.reset_index(drop=True)).to_feather(fh)
+        end_pos = _tell(fh)
+        rec["rows"], rec["bytes"] = len(df), end_pos - start_pos if None not in (start_pos, end_pos) else None
+
+
+def _tell(fh):
+    # Zip member streams and pipes can't report a position; their byte counts are simply left out
+    try: return fh.tell()
+    except (OSError, AttributeError, ValueError): return None
+
+
+def cached_export(cache_key, build_fn):
+    """build_fn() -> bytes, memoized under cache_key; for files assembled from more than one frame."""
+    return DATA_CACHE.get_or_compute(("export",) + tuple(cache_key), build_fn, ttl=EXPORT_CACHE_TTL_SECONDS,
+                                     should_cache=lambda data: len(data) <= DATA_CACHE.max_bytes * EXPORT_CACHE_MAX_SHARE)
+
+
+def export_bytes(df, fmt, dataset_key=None, index=True):
+    """Encoded file contents, memoized per (dataset_key, fmt) when a key is given."""
+    def encode():
+        buf = io.BytesIO(); write_export(df, fmt, buf, index=index)
+        return buf.getvalue()
+    return encode() if dataset_key is None else cached_export((dataset_key, fmt, index), encode)
+# --- END OF DATA EXPORT ---
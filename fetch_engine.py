@@ -0,0 +1,100 @@
+import os
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from corporate_actions import fetch_actions_table, select_action_series, slice_date_range
+from data_export import EXPORT_FORMATS, write_export
+from instrumentation import timed
+from ohlcv_store import fetch_ohlcv
+
+# --- FETCH ENGINE ---
+# Streamlit-free pipeline shared by the app, the batch runner and the CLI:
+# resolve criteria -> fetch -> filter -> normalize -> export.
+
+PERIOD_CODES = {"1 Year": "1y", "2 Years": "2y", "3 Years": "3y", "5 Years": "5y", "Max": "max", "Custom Range": "custom"}
+DATA_TYPE_CODES = {"Historical Prices (OHLCV)": "1", "Dividends": "2", "Stock Splits": "3", "Capital Gains": "4"}
+DATA_TYPE_SUFFIXES = {'1': "historical_prices", '2': "dividends", '3': "stock_splits", '4': "capital_gains"}
+INTERVALS = {'d': ('1d', "daily"), 'w': ('1wk', "weekly"), 'm': ('1mo', "monthly")}
+
+
+class CriteriaError(ValueError):
+    pass
+
+
+def get_date_range_from_period_keyword(period_keyword_ui_label, custom_start_date_obj=None, custom_end_date_obj=None, period_end_date_obj=None):
+    """Return (start_yf, start_filename, end_yf, end_filename); start_yf is None for 'Max'. Preset periods end
+    on period_end_date_obj (default: today). Raises CriteriaError."""
+    today = period_end_date_obj or datetime.today().date()
+    period_code = PERIOD_CODES.get(period_keyword_ui_label)
+
+    if period_code == "custom":
+        if not (custom_start_date_obj and custom_end_date_obj):
+            raise CriteriaError("Custom start or end date is missing for 'Custom Range' selection.")
+        if custom_end_date_obj < custom_start_date_obj:
+            raise CriteriaError("Custom end date cannot be before custom start date.")
+        return (custom_start_date_obj.strftime('%Y-%m-%d'), custom_start_date_obj.strftime('%d-%m-%Y'),
+                custom_end_date_obj.strftime('%Y-%m-%d'), custom_end_date_obj.strftime('%d-%m-%Y'))
+    if period_code == "max":
+        return None, "inception", today.strftime('%Y-%m-%d'), today.strftime('%d-%m-%Y')
+    if period_code:
+        start = today - timedelta(days=365 * int(period_code[:-1]))
+        return start.strftime('%Y-%m-%d'), start.strftime('%d-%m-%Y'), today.strftime('%Y-%m-%d'), today.strftime('%d-%m-%Y')
+    raise CriteriaError(f"Unknown or invalid date period processing: {period_keyword_ui_label}")
+
+
+def sanitize_filename(name):
+    if not name: return "unknown_company"
+    name = re.sub(r'[<>:"/\\|?*]', '_', name); name = re.sub(r'\s+', '_', name)
+    return name.strip('_')
+
+
+def resolve_criteria(ticker, period_label="1 Year", data_type_code="1", interval_code="d", custom_start=None, custom_end=None, period_end=None):
+    """Build the criteria dict the rest of the pipeline (and the app's session state) works from."""
+    if not ticker: raise CriteriaError("Please select or enter a ticker.")
+    if data_type_code not in DATA_TYPE_SUFFIXES: raise CriteriaError(f"Unknown data type code: {data_type_code}")
+    s_yf, s_fn, e_yf, e_fn = get_date_range_from_period_keyword(period_label, custom_start, custom_end, period_end)
+    criteria = {'ticker': ticker, 'start_date_yf': s_yf, 'start_date_filename': s_fn, 'end_date_yf': e_yf, 'end_date_filename': e_fn,
+                'data_type_code': data_type_code, 'base_file_description_suffix': DATA_TYPE_SUFFIXES[data_type_code]}
+    if data_type_code == "1" and interval_code:
+        if interval_code not in INTERVALS: raise CriteriaError(f"Unknown interval code: {interval_code}")
+        yf_interval, interval_desc = INTERVALS[interval_code]
+        criteria.update({'interval_yf': yf_interval, 'interval_desc': interval_desc,
+                         'base_file_description_suffix': f"historical_prices_{interval_desc}"})
+    return criteria
+
+
+@timed("fetch_total")
+def fetch_data(criteria):
+    """Fetch and date-filter the data for criteria. Returns None when the source had nothing at all,
+    and an empty object when data exists but none of it falls inside the requested range."""
+    ticker = criteria['ticker']
+    if criteria['data_type_code'] == "1":
+        # Served from the local daily store (weekly/monthly are resampled from it); only missing ranges hit Yahoo
+        data = fetch_ohlcv(ticker, criteria.get('start_date_yf'), criteria.get('end_date_yf'), interval=criteria.get('interval_yf') or "1d")
+        return data if not data.empty else None
+    # One cached actions request covers dividends, splits and capital gains
+    data = select_action_series(fetch_actions_table(ticker), criteria['data_type_code'])
+    if data.empty: return None
+    return slice_date_range(data, criteria.get('start_date_yf'), criteria.get('end_date_yf'))
+
+
+def normalize_result(data, criteria):
+    if isinstance(data, pd.Series): return data.to_frame(name=criteria.get("base_file_description_suffix", "Data"))
+    return data
+
+
+def build_file_name(criteria, fmt="CSV", company=None):
+    fn_company = sanitize_filename(company or criteria.get("ticker", "unknown")); fn_suffix = criteria.get("base_file_description_suffix", "data")
+    fn_start = criteria.get("start_date_filename", "inception"); fn_end = criteria.get("end_date_filename", "today")
+    file_name = re.sub(r'_+', '_', f"{fn_company}_{fn_suffix}_{fn_start}_to_{fn_end}").strip('_')
+    return file_name + EXPORT_FORMATS[fmt][0]
+
+
+def export_result(df, criteria, out_dir=".", fmt="CSV", company=None, index=True):
+    path = os.path.join(out_dir, build_file_name(criteria, fmt, company=company))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, "wb") as fh: write_export(df, fmt, fh, index=index)
+    return path
+# --- END OF FETCH ENGINE ---
@@ -0,0 +1,119 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_fetch import run_batch
+from fetch_engine import fetch_data, normalize_result
+
+# --- BACKGROUND FETCH JOBS ---
+# Fetches run on a process-wide thread pool instead of the Streamlit script thread.
+# Jobs are looked up by ID, so a session can keep polling the same job across any
+# number of reruns while the user keeps working with other widgets.
+
+FINISHED_JOB_TTL_SECONDS = 3600
+PRUNE_INTERVAL_SECONDS = 300
+# Batches hold a worker for their whole run, so they get their own pool and can never
+# queue up every other session's single-ticker fetch behind them
+SINGLE_FETCH_WORKERS = 4
+BATCH_JOB_WORKERS = 2
+
+
+class FetchJob:
+    def __init__(self, label, total=1):
+        self.id = uuid.uuid4().hex
+        self.label, self.total, self.done = label, total, 0
+        self.status = "queued"
+        self.result, self.error = None, None
+        self.partial, self.failures = {}, {}  # ticker -> DataFrame / error message, filled as tickers finish
+        self.created_at, self.finished_at = time.time(), None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self): return self.status in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        # Cooperative: batch jobs stop at the next ticker boundary; a single in-flight
+        # Yahoo request can't be interrupted, so its result is simply discarded.
+        self.cancel_event.set()
+        with self._lock:
+            if not self.finished: self.status = "cancelled"; self.finished_at = time.time()
+
+    def report_progress(self, done, total, ticker=None, error=None):
+        with self._lock:
+            self.done, self.total = done, total
+            if error is not None and ticker is not None: self.failures[ticker] = error
+
+    def add_partial(self, ticker, data):
+        with self._lock: self.partial[ticker] = data
+
+    def progress_fraction(self):
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+
+class JobManager:
+    def __init__(self, single_workers=SINGLE_FETCH_WORKERS, batch_workers=BATCH_JOB_WORKERS):
+        self._pools = {"single": ThreadPoolExecutor(max_workers=single_workers, thread_name_prefix="fetch-job"),
+                       "batch": ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix="batch-job")}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Finished results are dropped even when no session ever submits or polls again
+        threading.Thread(target=self._sweep, daemon=True, name="job-sweeper").start()
+
+    def submit(self, label, work_fn, total=1, kind="single"):
+        """Run work_fn(job) in the background on the 'single' or 'batch' pool; its return value becomes job.result."""
+        job = FetchJob(label, total=total)
+        with self._lock:
+            self._prune_locked()
+            self._jobs[job.id] = job
+        self._pools[kind].submit(self._run, job, work_fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._prune_locked()
+            return self._jobs.get(job_id)
+
+    def _run(self, job, work_fn):
+        with job._lock:
+            if job.status == "cancelled": return
+            job.status = "running"
+        try:
+            result = work_fn(job)
+        except Exception as e:
+            with job._lock:
+                if job.status != "cancelled": job.status, job.error = "failed", str(e) or e.__class__.__name__
+        else:
+            with job._lock:
+                if job.status != "cancelled": job.status, job.result = "done", result
+        with job._lock:
+            if job.finished_at is None: job.finished_at = time.time()
+
+    def _sweep(self):
+        while True:
+            time.sleep(PRUNE_INTERVAL_SECONDS)
+            with self._lock: self._prune_locked()
+
+    def _prune_locked(self):
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]: del self._jobs[job_id]
+
+
+JOB_MANAGER = JobManager()
+
+
+def submit_single_fetch(criteria):
+    def work(job):
+        data = fetch_data(criteria)
+        job.report_progress(1, 1)
+        return normalize_result(data, criteria) if data is not None else None
+    return JOB_MANAGER.submit(f"{criteria.get('ticker')} {criteria.get('base_file_description_suffix', '')}", work)
+
+
+def submit_batch_fetch(tickers, criteria, **batch_kwargs):
+    def work(job):
+        return run_batch(tickers, criteria, on_progress=job.report_progress, on_result=job.add_partial,
+                         cancel_event=job.cancel_event, **batch_kwargs)
+    return JOB_MANAGER.submit(f"Batch of {len(tickers)} tickers", work, total=len(tickers), kind="batch")
+# --- END OF BACKGROUND FETCH JOBS ---
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from cache_utils import TTLCache
+from instrumentation import timed
+
+# --- INDICATORS ---
+# Vectorized indicator kernels over a price column. Results are memoized per
+# (ticker, interval, indicator, params); when the same series comes back with new bars
+# (or a restated live bar), only the changed tail is computed from the cached state.
+
+ANNUALIZATION = {"1d": 252, "1wk": 52, "1mo": 12}
+MIN_WINDOW = 2  # Smallest window/span the kernels (and the app's number inputs) accept
+
+_indicator_cache = TTLCache(maxsize=256, ttl_seconds=6 * 3600)
+
+
+def _windowed(close, start, lookback, fn):
+    # Stateless rolling kernels only need `lookback` rows of history before `start`
+    s0 = max(start - lookback, 0)
+    return fn(close[s0:])[start - s0:]
+
+
+def _simple_returns(c):
+    out = np.full(len(c), np.nan)
+    if len(c) > 1: out[1:] = c[1:] / c[:-1] - 1
+    return out
+
+
+def _log_returns(c):
+    out = np.full(len(c), np.nan)
+    if len(c) > 1: out[1:] = np.log(c[1:] / c[:-1])
+    return out
+
+
+def returns_kernel(close, start=0, prev=None):
+    return _windowed(close, start, 1, _simple_returns)
+
+
+def log_returns_kernel(close, start=0, prev=None):
+    return _windowed(close, start, 1, _log_returns)
+
+
+def sma_kernel(close, window=20, start=0, prev=None):
+    return _windowed(close, start, window - 1, lambda c: pd.Series(c).rolling(window).mean().to_numpy())
+
+
+def volatility_kernel(close, window=20, periods_per_year=252, start=0, prev=None):
+    fn = lambda c: pd.Series(_log_returns(c)).rolling(window).std().to_numpy() * np.sqrt(periods_per_year)
+    return _windowed(close, start, window, fn)
+
+
+def ema_kernel(close, span=20, start=0, prev=None):
+    if start == 0 or prev is None or np.isnan(prev[-1]):
+        return pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()[start:]
+    # adjust=False is a plain recursion, so seeding it with the last cached EMA continues it exactly
+    seeded = np.concatenate(([prev[-1]], close[start:]))
+    return pd.Series(seeded).ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+
+def drawdown_kernel(close, start=0, prev=None):
+    if start == 0 or prev is None or not np.isfinite(prev[-1]) or prev[-1] <= -1:
+        running_max = np.fmax.accumulate(close)
+        return (close / running_max - 1)[start:]
+    prev_max = close[start - 1] / (1 + prev[-1])  # Recover the running peak from the last drawdown value
+    running_max = np.fmax.accumulate(np.concatenate(([prev_max], close[start:])))[1:]
+    return close[start:] / running_max - 1
+
+
+# name -> (kernel, default params, column name builder)
+INDICATORS = {
+    "Returns": (returns_kernel, {}, lambda p: "Returns"),
+    "Log Returns": (log_returns_kernel, {}, lambda p: "Log_Returns"),
+    "SMA": (sma_kernel, {"window": 20}, lambda p: f"SMA_{p['window']}"),
+    "EMA": (ema_kernel, {"span": 20}, lambda p: f"EMA_{p['span']}"),
+    "Rolling Volatility": (volatility_kernel, {"window": 20}, lambda p: f"Volatility_{p['window']}"),
+    "Drawdown": (drawdown_kernel, {}, lambda p: "Drawdown"),
+}
+
+
+def _common_prefix(old_index, old_close, new_index, new_close):
+    # Number of leading bars that are identical in both series (same timestamp and price)
+    m = min(len(old_index), len(new_index))
+    same = (old_index[:m] == new_index[:m]) & ((old_close[:m] == new_close[:m]) | (np.isnan(old_close[:m]) & np.isnan(new_close[:m])))
+    mismatch = np.flatnonzero(~same)
+    return int(mismatch[0]) if len(mismatch) else m
+
+
+def compute_indicator(close_series, name, params=None, cache_key=None):
+    """One indicator over close_series as a Series aligned to its index. With a cache_key
+    (e.g. (ticker, interval)) results are memoized and extended incrementally."""
+    kernel, defaults, _ = INDICATORS[name]
+    params = dict(defaults, **(params or {}))
+    index = close_series.index.values
+    close = close_series.to_numpy(dtype=np.float64)
+    key = None if cache_key is None else (*cache_key, name, tuple(sorted(params.items())))
+    entry = _indicator_cache.get(key) if key is not None else None
+
+    if entry is not None:
+        start = _common_prefix(entry["index"], entry["close"], index, close)
+        if start == len(close): values = entry["values"][:start]
+        elif start > 0: values = np.concatenate((entry["values"][:start], kernel(close, start=start, prev=entry["values"][:start], **params)))
+        else: values = kernel(close, **params)
+    else:
+        values = kernel(close, **params)
+    if key is not None and (entry is None or len(close) >= len(entry["close"])):
+        _indicator_cache.set(key, {"index": index, "close": close, "values": values})
+    return pd.Series(values, index=close_series.index, name=INDICATORS[name][2](params))
+
+
+@timed("indicators")
+def add_indicators(df, selections, cache_key=None, interval="1d", price_column="Close"):
+    """Return a copy of df with one column per (name, params) in selections appended."""
+    if not selections or df is None or price_column not in df.columns: return df
+    columns = []
+    for name, params in selections:
+        if name == "Rolling Volatility": params = dict({"periods_per_year": ANNUALIZATION.get(interval or "1d", 252)}, **params)
+        columns.append(compute_indicator(df[price_column], name, params, cache_key))
+    return pd.concat([df] + columns, axis=1)
+
+
+def add_indicators_to_batch(results, selections, interval="1d"):
+    return {ticker: add_indicators(df, selections, cache_key=(ticker, interval or "1d"), interval=interval) for ticker, df in results.items()}
+
+
+def parse_indicator_spec(spec):
+    """'SMA:50,EMA:12,Drawdown' -> [('SMA', {'window': 50}), ('EMA', {'span': 12}), ('Drawdown', {})]"""
+    lookup = {name.lower().replace(" ", "").replace("_", ""): name for name in INDICATORS}
+    selections = []
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        raw_name, _, raw_value = part.partition(":")
+        name = lookup.get(raw_name.lower().replace(" ", "").replace("_", "").replace("-", ""))
+        if name is None: raise ValueError(f"Unknown indicator: {raw_name}")
+        params = {}
+        if raw_value:
+            if not INDICATORS[name][1]: raise ValueError(f"{name} takes no parameter")
+            param = next(iter(INDICATORS[name][1]))
+            try: value = int(raw_value)
+            except ValueError: raise ValueError(f"{name} {param} must be a whole number, got {raw_value!r}") from None
+            if value < MIN_WINDOW: raise ValueError(f"{name} {param} must be at least {MIN_WINDOW}, got {value}")
+            params[param] = value
+        selections.append((name, params))
+    return selections
+# --- END OF INDICATORS ---
@@ -0,0 +1,111 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# --- STAGE INSTRUMENTATION ---
+# Wall time, row and byte counts for every pipeline stage (search, download, filter,
+# resample, indicators, export). Records feed a process-wide registry that the
+# diagnostics panel reads, are logged as one JSON line each on the "stock_app.metrics"
+# logger, and can be dumped in Prometheus text format.
+
+logger = logging.getLogger("stock_app.metrics")
+
+RECENT_RECORDS = 200
+
+
+class StageMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}  # stage -> {'calls', 'errors', 'seconds', 'max_seconds', 'rows', 'bytes'}
+        self._recent = deque(maxlen=RECENT_RECORDS)
+
+    def record(self, rec):
+        with self._lock:
+            t = self._totals.setdefault(rec["stage"], {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0, "bytes": 0})
+            t["calls"] += 1; t["seconds"] += rec["seconds"]; t["max_seconds"] = max(t["max_seconds"], rec["seconds"])
+            t["errors"] += 1 if rec.get("error") else 0
+            t["rows"] += rec.get("rows") or 0; t["bytes"] += rec.get("bytes") or 0
+            self._recent.append(rec)
+        logger.info(json.dumps(rec, default=str))
+
+    def totals(self):
+        with self._lock: return {stage: dict(t) for stage, t in self._totals.items()}
+
+    def recent(self):
+        with self._lock: return list(self._recent)
+
+    def reset(self):
+        with self._lock: self._totals.clear(); self._recent.clear()
+
+    def totals_frame(self):
+        totals = self.totals()
+        if not totals: return pd.DataFrame()
+        df = pd.DataFrame.from_dict(totals, orient="index").rename_axis("stage")
+        df["avg_ms"] = df["seconds"] / df["calls"] * 1000
+        return df.sort_values("seconds", ascending=False)
+
+    def prometheus_text(self, extra_gauges=None):
+        """Prometheus exposition-format dump of the stage counters (plus optional {name: value} gauges)."""
+        lines = []
+        series = (("stage_calls_total", "calls", "counter", "Stage invocations"),
+                  ("stage_errors_total", "errors", "counter", "Stage invocations that raised"),
+                  ("stage_seconds_total", "seconds", "counter", "Wall time spent in stage"),
+                  ("stage_max_seconds", "max_seconds", "gauge", "Slowest single stage invocation"),
+                  ("stage_rows_total", "rows", "counter", "Rows produced by stage"),
+                  ("stage_bytes_total", "bytes", "counter", "Bytes produced by stage"))
+        totals = self.totals()
+        for metric, field, kind, help_text in series:
+            lines += [f"# HELP stock_app_{metric} {help_text}", f"# TYPE stock_app_{metric} {kind}"]
+            lines += [f'stock_app_{metric}{{stage="{stage}"}} {t[field]}' for stage, t in sorted(totals.items())]
+        for name, value in (extra_gauges or {}).items():
+            lines += [f"# TYPE stock_app_{name} gauge", f"stock_app_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+METRICS = StageMetrics()
+
+
+def measure_result(result):
+    """(rows, bytes) for the usual stage outputs."""
+    if isinstance(result, pd.DataFrame): return len(result), int(result.memory_usage(deep=True).sum())
+    if isinstance(result, pd.Series): return len(result), int(result.memory_usage(deep=True))
+    if isinstance(result, (bytes, bytearray)): return None, len(result)
+    if isinstance(result, str) and os.path.isfile(result): return None, os.path.getsize(result)
+    if isinstance(result, (list, dict)): return len(result), None
+    return None, None
+
+
+@contextmanager
+def stage(name, **labels):
+    """Time a block; the yielded dict may be given 'rows'/'bytes' before the block ends."""
+    rec = dict(labels, stage=name, rows=None, bytes=None)
+    started = time.perf_counter()
+    try:
+        yield rec
+    except Exception as e:
+        rec["error"] = e.__class__.__name__
+        raise
+    finally:
+        rec["seconds"] = time.perf_counter() - started
+        rec["ts"] = time.time()
+        METRICS.record(rec)
+
+
+def timed(name, measure=measure_result):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name) as rec:
+                result = fn(*args, **kwargs)
+                rec["rows"], rec["bytes"] = measure(result)
+                return result
+        return wrapper
+    return decorator
+# --- END OF STAGE INSTRUMENTATION ---
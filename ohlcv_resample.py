@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+# --- OHLCV RESAMPLING ---
+# Builds Yahoo-style weekly/monthly bars from one unadjusted daily frame, so all three
+# intervals share a single download. Bars are labelled like Yahoo's own: weeks by their
+# Monday, months by their first calendar day.
+
+RESAMPLE_INTERVALS = ("1wk", "1mo")
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Adj Close": "last", "Volume": "sum"}
+
+
+def _period_labels(index, interval):
+    # Vectorized bucket start for every row: Monday of its week / 1st of its month
+    days = index.values.astype("datetime64[D]")
+    if interval == "1wk":
+        # 1970-01-01 was a Thursday, so shift by 3 to make Monday weekday 0
+        labels = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    else:
+        labels = days.astype("datetime64[M]").astype("datetime64[D]")
+    return pd.DatetimeIndex(labels).as_unit(index.unit)  # Same resolution as the daily index it came from
+
+
+@timed("resample")
+def resample_ohlcv(daily_df, interval):
+    """Aggregate unadjusted daily bars (Open/High/Low/Close[/Adj Close]/Volume) into 1wk or 1mo bars."""
+    if interval not in RESAMPLE_INTERVALS: raise ValueError(f"Unsupported resample interval: {interval}")
+    if daily_df is None or daily_df.empty: return daily_df
+    # Rows with no Open are gaps Yahoo sometimes pads in; they must not become first/last values
+    daily_df = daily_df.dropna(subset=[c for c in ("Open", "Close") if c in daily_df.columns], how="all")
+    agg = {c: f for c, f in OHLCV_AGG.items() if c in daily_df.columns}
+    out = daily_df.groupby(_period_labels(daily_df.index, interval), sort=True).agg(agg)
+    out.index.name = daily_df.index.name or "Date"
+    return out[[c for c in daily_df.columns if c in agg]]
+
+
+def apply_auto_adjust(df):
+    """Same transform yfinance applies for auto_adjust=True: scale O/H/L by Adj Close / Close per bar."""
+    if df is None or df.empty or "Adj Close" not in df.columns: return df
+    df = df.copy()
+    ratio = (df["Adj Close"] / df["Close"]).to_numpy()
+    for col in ("Open", "High", "Low"):
+        if col in df.columns: df[col] = df[col].to_numpy() * ratio
+    df["Close"] = df["Adj Close"]
+    return df.drop(columns="Adj Close")
+# --- END OF OHLCV RESAMPLING ---
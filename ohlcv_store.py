@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from cache_utils import DATA_CACHE, atomic_write, compact_frame
+from instrumentation import measure_result, stage, timed
+from ohlcv_resample import RESAMPLE_INTERVALS, apply_auto_adjust, resample_ohlcv
+from yahoo_client import fetch_history
+
+# --- LOCAL OHLCV STORE ---
+# One Parquet file of unadjusted daily bars per ticker plus a small JSON sidecar
+# recording which date range the file already covers. Requests only download the
+# missing head/tail of that range, so repeat pulls are served straight from disk.
+
+STORE_DIR = os.environ.get("STOCK_APP_STORE_DIR", os.path.join(os.path.expanduser("~"), ".stock_app_cache", "ohlcv"))
+STORE_SCHEMA = 4  # Bump when stored entries become invalid (columns, coverage bugs); older entries are refetched
+LIVE_BAR_TTL_SECONDS = 15 * 60  # How long today's (still moving) bar is trusted before it is re-downloaded
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def _key_lock(ticker, interval):
+    with _key_locks_guard:
+        return _key_locks.setdefault((ticker, interval), threading.Lock())
+
+
+def _store_paths(ticker, interval, store_dir=None):
+    base = os.path.join(store_dir or STORE_DIR, f"{re.sub(r'[^A-Za-z0-9._^=-]', '_', ticker)}_{interval}")
+    return base + ".parquet", base + ".json"
+
+
+def _period_floor(ts, interval):
+    # Weekly/monthly bars are labelled by the start of their period, so the daily window
+    # behind them must start on that boundary or the first bar would come out partial.
+    ts = pd.Timestamp(ts).normalize()
+    if interval == "1wk": return ts - timedelta(days=ts.weekday())
+    if interval == "1mo": return ts.replace(day=1)
+    return ts
+
+
+def normalize_ohlcv_frame(df):
+    """Flatten yfinance's (Price, Ticker) columns and give the frame a sorted, tz-naive, unique index."""
+    if df is None or df.empty: return pd.DataFrame()
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+    df.columns.name = None
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None: df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+@timed("store_read", measure=lambda entry: measure_result(entry[0]))
+def load_store_entry(ticker, interval, store_dir=None):
+    data_path, meta_path = _store_paths(ticker, interval, store_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)): return None, None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh: meta = json.load(fh)
+        return pd.read_parquet(data_path), meta
+    except (OSError, ValueError): return None, None  # Corrupt/partial entry: treat as a cold miss
+
+
+def _save_store_entry(ticker, interval, df, meta, store_dir=None):
+    data_path, meta_path = _store_paths(ticker, interval, store_dir)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    with stage("store_write", ticker=ticker) as rec:
+        # Data before meta: a reader in between sees more rows than the meta claims, which only costs a refetch
+        atomic_write(data_path, df.to_parquet)
+        atomic_write(meta_path, lambda fh: json.dump(meta, fh), mode="w")
+        rec["rows"], rec["bytes"] = len(df), os.path.getsize(data_path)
+
+
+@timed("yf_download")
+def _download_range(ticker, start, end):
+    # Unadjusted bars + Adj Close: weekly/monthly bars have to be built before the
+    # dividend adjustment is applied, exactly like Yahoo's own 1wk/1mo series
+    # With only an end date yfinance falls back to a one month window; inception needs period="max"
+    span = {"start": start.strftime('%Y-%m-%d')} if start is not None else {"period": "max"}
+    # Not yf.download: it swallows every error into an empty frame, which would look like "no data"
+    raw = fetch_history(ticker, end=end.strftime('%Y-%m-%d'), interval="1d", auto_adjust=False, actions=False, timeout=20, **span)
+    return normalize_ohlcv_frame(raw)
+
+
+def _rebase_to_anchor(cached_df, gap_df, anchor):
+    # Yahoo restates history after splits (Close/Volume) and dividends (Adj Close).
+    # Re-downloading one already stored bar tells us by how much, so the stored rows
+    # can be rescaled instead of thrown away.
+    if anchor is None or anchor not in gap_df.index or pd.isna(gap_df.at[anchor, "Close"]): return cached_df
+    old, new = cached_df.loc[anchor], gap_df.loc[anchor]
+    split_factor = new["Close"] / old["Close"] if old["Close"] else 1.0
+    adj_factor = new["Adj Close"] / old["Adj Close"] if "Adj Close" in cached_df.columns and old["Adj Close"] else 1.0
+    if pd.isna(adj_factor): adj_factor = 1.0
+    if abs(split_factor - 1) < 1e-6 and abs(adj_factor - 1) < 1e-6: return cached_df
+    cached_df = cached_df.copy()
+    for col in ("Open", "High", "Low", "Close"):
+        if col in cached_df.columns: cached_df[col] *= split_factor
+    if "Adj Close" in cached_df.columns: cached_df["Adj Close"] *= adj_factor
+    if "Volume" in cached_df.columns and abs(split_factor - 1) >= 1e-6:
+        cached_df["Volume"] = (cached_df["Volume"] / split_factor).round()
+    return cached_df
+
+
+def _fetch_daily(ticker, req_start, req_end, store_dir=None, downloader=None):
+    # req_start/req_end are Timestamps, req_end exclusive, req_start None = inception
+    downloader = downloader or _download_range
+    today = pd.Timestamp(datetime.today().date())
+    with _key_lock(ticker, "1d"):
+        cached_df, meta = load_store_entry(ticker, "1d", store_dir)
+        if meta is not None and meta.get("schema") != STORE_SCHEMA: cached_df, meta = None, None
+        gaps = []  # (start, end, anchor): each gap next to stored rows re-downloads one of them (the anchor)
+        if cached_df is None:
+            cached_df, meta = pd.DataFrame(), None
+            gaps.append((req_start, req_end, None))
+        else:
+            cov_start = pd.Timestamp(meta["start"]) if meta.get("start") else None
+            cov_end, final_end = pd.Timestamp(meta["end"]), pd.Timestamp(meta["final_end"])
+            priced = cached_df.index[cached_df["Close"].notna()] if "Close" in cached_df.columns else cached_df.index
+            if cov_start is not None and (req_start is None or req_start < cov_start):
+                anchor = priced[0] if len(priced) else None
+                gaps.append((req_start, anchor + timedelta(days=1) if anchor is not None else cov_start, anchor))
+            live_bar_stale = cov_end > final_end and time.time() - meta.get("fetched_at", 0) > LIVE_BAR_TTL_SECONDS
+            if req_end > cov_end or (req_end > final_end and live_bar_stale):
+                final_rows = priced[priced < final_end]
+                anchor = final_rows[-1] if len(final_rows) else None
+                gaps.append((anchor if anchor is not None else final_end, max(req_end, cov_end), anchor))
+
+        pieces, fetched = [], []
+        for gap_start, gap_end, anchor in gaps:
+            gap_df = downloader(ticker, gap_start, gap_end)
+            # An empty answer can't be told apart from a failed download, so it does not extend coverage
+            if gap_df is None or gap_df.empty: continue
+            # Downloads come at today's adjustment; stored rows are rescaled to match before they are merged
+            cached_df = _rebase_to_anchor(cached_df, gap_df, anchor)
+            pieces.append(gap_df); fetched.append((gap_start, gap_end))
+
+        if fetched:
+            merged = normalize_ohlcv_frame(pd.concat([p for p in [cached_df] + pieces if not p.empty]))
+            starts = [s for s, _ in fetched] + ([pd.Timestamp(meta["start"]) if meta.get("start") else None] if meta else [])
+            new_start = None if any(s is None for s in starts) else min(starts)
+            new_end = max([e for _, e in fetched] + ([pd.Timestamp(meta["end"])] if meta else []))
+            # Today's bar may still change, everything before it is final
+            new_meta = {"schema": STORE_SCHEMA, "start": new_start.strftime('%Y-%m-%d') if new_start is not None else None,
+                        "end": new_end.strftime('%Y-%m-%d'), "final_end": min(new_end, today).strftime('%Y-%m-%d'),
+                        "fetched_at": time.time()}
+            _save_store_entry(ticker, "1d", merged, new_meta, store_dir)
+            cached_df = merged
+
+    if cached_df.empty: return cached_df
+    with stage("date_filter", ticker=ticker) as rec:
+        window = cached_df.loc[req_start:req_end - pd.Timedelta(1, "ns")]
+        rec["rows"] = len(window)
+    return window
+
+
+def fetch_ohlcv(ticker, start_date_yf, end_date_yf, interval="1d", store_dir=None, downloader=None):
+    """Return auto-adjusted OHLCV bars for [start_date_yf, end_date_yf] (inclusive, 'YYYY-MM-DD',
+    None = inception/today). Only daily bars are stored; 1wk/1mo are resampled from them locally.
+    Results are shared across sessions through DATA_CACHE; treat the returned frame as read-only."""
+    if store_dir is not None or downloader is not None:  # Non-default sources must not pollute the shared cache
+        return _build_ohlcv(ticker, start_date_yf, end_date_yf, interval, store_dir, downloader)
+    return DATA_CACHE.get_or_compute(("ohlcv", ticker, interval or "1d", start_date_yf, end_date_yf),
+                                     lambda: _build_ohlcv(ticker, start_date_yf, end_date_yf, interval),
+                                     should_cache=lambda df: not df.empty, ttl=LIVE_BAR_TTL_SECONDS)
+
+
+def _build_ohlcv(ticker, start_date_yf, end_date_yf, interval, store_dir=None, downloader=None):
+    today = pd.Timestamp(datetime.today().date())
+    req_start = _period_floor(start_date_yf, interval) if start_date_yf else None
+    req_end = (pd.Timestamp(end_date_yf) if end_date_yf else today) + timedelta(days=1)  # Exclusive
+    daily = _fetch_daily(ticker, req_start, req_end, store_dir=store_dir, downloader=downloader)
+    if interval in RESAMPLE_INTERVALS: daily = resample_ohlcv(daily, interval)
+    elif interval not in (None, "1d"): raise ValueError(f"Unsupported interval: {interval}")
+    return compact_frame(apply_auto_adjust(daily))
+# --- END OF LOCAL OHLCV STORE ---
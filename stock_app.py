@@ -1,10 +1,19 @@
 import streamlit as st
 from datetime import datetime, timedelta, date # Ensure 'date' is imported
-import re
+import uuid
 import pandas as pd
-import yfinance as yf
 import requests
 
+from cache_utils import DATA_CACHE
+from chart_downsample import MAX_CHART_POINTS, downsample_price, downsample_volume, slice_window
+from data_export import EXPORT_FORMATS, cached_export, export_bytes
+from fetch_engine import CriteriaError, DATA_TYPE_CODES, PERIOD_CODES, build_file_name, resolve_criteria
+from batch_fetch import batch_to_long_frame, batch_to_zip_bytes, parse_ticker_list, read_ticker_file
+from indicators import INDICATORS, MIN_WINDOW, add_indicators, add_indicators_to_batch
+from fetch_jobs import JOB_MANAGER, submit_batch_fetch, submit_single_fetch
+from instrumentation import METRICS
+from ticker_search import fetch_search_results, suggest_tickers
+
 # --- HELPER FUNCTIONS ---
 def parse_user_date_input(date_str_input, date_name="date"): # Less used now with st.date_input
     formats_to_try = ['%d-%m-%y', '%d-%m-%Y']
@@ -15,74 +24,89 @@ def parse_user_date_input(date_str_input, date_name="date"): # Less used now wit
     if dt_obj is None: return None, None
     return dt_obj.strftime('%Y-%m-%d'), dt_obj.strftime('%d-%m-%Y')
 
-def get_date_range_from_period_keyword(period_keyword_ui_label, custom_start_date_obj=None, custom_end_date_obj=None):
-    today = datetime.today().date() # Use .date() for consistency with st.date_input
-    s_yf, s_fn, e_yf, e_fn = None, None, None, None
-    period_keyword_map_to_code = {
-        "1 Year": "1y", "2 Years": "2y", "3 Years": "3y", "5 Years": "5y", "Max": "max", "Custom Range": "custom"
-    }
-    period_code = period_keyword_map_to_code.get(period_keyword_ui_label)
-
-    if period_code == "custom":
-        if custom_start_date_obj and custom_end_date_obj:
-            # custom_start_date_obj and custom_end_date_obj are already datetime.date objects
-            if custom_end_date_obj < custom_start_date_obj:
-                # This error should ideally be caught by st.date_input's min_value for end_date
-                st.sidebar.error("Custom end date cannot be before custom start date.")
-                return None, None, None, None
-            s_yf = custom_start_date_obj.strftime('%Y-%m-%d')
-            s_fn = custom_start_date_obj.strftime('%d-%m-%Y')
-            e_yf = custom_end_date_obj.strftime('%Y-%m-%d')
-            e_fn = custom_end_date_obj.strftime('%d-%m-%Y')
-            return s_yf, s_fn, e_yf, e_fn
-        else:
-            # This should ideally not be reached if st.date_input has default values
-            st.sidebar.error("Custom start or end date is missing for 'Custom Range' selection.")
-            return None, None, None, None
-    elif period_code:
-        e_yf = today.strftime('%Y-%m-%d')
-        e_fn = today.strftime('%d-%m-%Y')
-        start_date_obj_calc = None # This will be a datetime.date object
-        if period_code == '1y': start_date_obj_calc = today - timedelta(days=365)
-        elif period_code == '2y': start_date_obj_calc = today - timedelta(days=365*2)
-        elif period_code == '3y': start_date_obj_calc = today - timedelta(days=365*3)
-        elif period_code == '5y': start_date_obj_calc = today - timedelta(days=365*5)
-        elif period_code == 'max':
-            s_yf = None # yfinance understands None as max
-            s_fn = "inception"
-            return s_yf, s_fn, e_yf, e_fn
-        
-        if start_date_obj_calc:
-            s_yf = start_date_obj_calc.strftime('%Y-%m-%d')
-            s_fn = start_date_obj_calc.strftime('%d-%m-%Y')
-            return s_yf, s_fn, e_yf, e_fn
-            
-    st.sidebar.error(f"Unknown or invalid date period processing: {period_keyword_ui_label}")
-    return None, None, None, None
-
-def sanitize_filename(name):
-    if not name: return "unknown_company"
-    name = re.sub(r'[<>:"/\\|?*]', '_', name); name = re.sub(r'\s+', '_', name)
-    return name.strip('_')
-
 def search_yahoo_for_tickers(search_query, result_count=20):
-    # ... (search_yahoo_for_tickers function remains the same)
+    # Pooled session + TTL response cache; every result also feeds the local ticker index
     if not search_query: return []
-    search_url = f"https://query2.finance.yahoo.com/v1/finance/search?q={search_query}&count={result_count}"
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; StreamlitStockApp/1.0)'}
-    try:
-        response = requests.get(search_url, headers=headers, timeout=10); response.raise_for_status()
-        data = response.json(); results = data.get('quotes', [])
-        formatted_results = []
-        for item in results:
-            name = item.get('longname', item.get('shortname', 'N/A')); symbol = item.get('symbol', 'N/A')
-            exchange = item.get('exchDisp', item.get('exchange', 'N/A'))
-            if symbol != 'N/A' and name != 'N/A':
-                formatted_results.append({'display': f"{symbol} - {name} ({exchange})", 'symbol': symbol})
-        return formatted_results
+    try: return fetch_search_results(search_query, result_count=result_count)
     except requests.exceptions.RequestException as e: st.error(f"Ticker search HTTP error: {e}"); return []
     except ValueError: st.error("Error parsing ticker search results (JSON)."); return []
     except Exception as e: st.error(f"Unexpected error in ticker search: {e}"); return []
+
+def lookup_tickers_as_you_type(search_query, result_count=20):
+    # Answer from the in-memory index first; only an index miss goes out over HTTP
+    if not search_query: return []
+    return suggest_tickers(search_query, limit=result_count) or search_yahoo_for_tickers(search_query, result_count=result_count)
+
+def render_export_format_selector():
+    # Binary formats (Parquet/Feather) are far smaller and faster to write than text CSV
+    format_labels = list(EXPORT_FORMATS.keys())
+    st.session_state.ui_export_format = st.selectbox("💾 Export Format:", options=format_labels,
+        index=format_labels.index(st.session_state.ui_export_format), key="export_format_widget")
+
+def current_indicator_selections():
+    params_by_name = {"SMA": {"window": st.session_state.ui_sma_window}, "EMA": {"span": st.session_state.ui_ema_span},
+                      "Rolling Volatility": {"window": st.session_state.ui_vol_window}}
+    return [(name, params_by_name.get(name, {})) for name in st.session_state.ui_indicator_selection]
+
+def render_price_chart(df):
+    # Only a downsampled view of the selected window is sent to the browser
+    st.subheader("📉 Price & Volume")
+    first_day, last_day = df.index[0].date(), df.index[-1].date()
+    window = (first_day, last_day)
+    if first_day < last_day:
+        window = st.slider("Visible window:", min_value=first_day, max_value=last_day, value=(first_day, last_day), key="chart_window_widget")
+    visible = slice_window(df, window[0], pd.Timestamp(window[1]) + timedelta(days=1) - pd.Timedelta(1, 'ns'))
+    price = downsample_price(visible, "Close", MAX_CHART_POINTS)
+    st.line_chart(price, height=300)
+    if 'Volume' in visible.columns: st.bar_chart(downsample_volume(visible, "Volume", MAX_CHART_POINTS), height=150)
+    st.caption(f"Showing {len(price):,} of {len(visible):,} points (LTTB downsampled)" if len(price) < len(visible) else f"Showing all {len(visible):,} points")
+
+def _apply_finished_fetch_job(job):
+    st.session_state.active_fetch_job_id = None
+    if job.status == "done" and job.result is not None and not job.result.empty:
+        st.session_state.fetched_data_df = job.result
+        st.session_state.fetched_data_key = uuid.uuid4().hex  # Memo key for lazily built exports
+        st.session_state.fetch_status_message = ("success", "✅ Data fetched successfully!")
+    elif job.status == "done" and job.result is not None:
+        st.session_state.fetch_status_message = ("info", "ℹ️ No data found for the given criteria after filtering.")
+    elif job.status == "done": st.session_state.fetch_status_message = ("warning", "⚠️ Could not fetch data or no data available from source.")
+    elif job.status == "failed": st.session_state.fetch_status_message = ("error", f"❌ Error during data fetching: {job.error}")
+    else: st.session_state.fetch_status_message = ("info", "⏹️ Fetch cancelled.")
+
+def _apply_finished_batch_job(job):
+    st.session_state.active_batch_job_id = None
+    if job.status == "done": results, failures = job.result
+    else: results, failures = dict(job.partial), dict(job.failures)  # Cancelled/failed: keep what finished
+    if job.status == "failed": st.session_state.fetch_status_message = ("error", f"❌ Batch download failed: {job.error}")
+    st.session_state.batch_results, st.session_state.batch_failures = results, failures
+    st.session_state.batch_criteria = dict(st.session_state.pending_batch_criteria, dataset_key=uuid.uuid4().hex)
+
+@st.fragment(run_every=1.0)
+def render_active_jobs():
+    # Re-runs on its own every second without blocking the rest of the page
+    for state_key, apply_fn in (("active_fetch_job_id", _apply_finished_fetch_job), ("active_batch_job_id", _apply_finished_batch_job)):
+        job = JOB_MANAGER.get(st.session_state[state_key]) if st.session_state[state_key] else None
+        if job is None: st.session_state[state_key] = None; continue
+        if job.finished: apply_fn(job); st.rerun()
+        c1, c2 = st.columns([4, 1])
+        with c1: st.progress(job.progress_fraction(), text=f"⏳ {job.label}: {job.status} ({job.done}/{job.total}, {len(job.partial)} ready)")
+        with c2:
+            if st.button("⏹️ Cancel", key=f"cancel_{job.id}", use_container_width=True): job.cancel()
+
+def render_diagnostics_panel():
+    # Process-wide stage timings (every session's fetches/exports), plus the same numbers as a Prometheus scrape
+    st.subheader("🩺 Diagnostics")
+    totals = METRICS.totals_frame()
+    if totals.empty: st.caption("_No pipeline stages have run yet._"); return
+    st.dataframe(totals.round({"seconds": 3, "max_seconds": 3, "avg_ms": 1}))
+    with st.expander(f"Last {len(METRICS.recent())} stage records"):
+        st.dataframe(pd.DataFrame(METRICS.recent()).drop(columns="ts", errors="ignore").iloc[::-1], hide_index=True)
+    prometheus_text = METRICS.prometheus_text({f"data_cache_{k}": v for k, v in DATA_CACHE.stats().items()})
+    with st.expander("Prometheus text"): st.code(prometheus_text, language="text")
+    c1, c2 = st.columns(2)
+    with c1: st.download_button("📥 Download metrics", data=prometheus_text, file_name="stock_app_metrics.prom", mime="text/plain", key="download_metrics_button", use_container_width=True)
+    with c2:
+        if st.button("🧹 Reset metrics", key="reset_metrics_button", use_container_width=True): METRICS.reset(); st.rerun()
 # --- END OF HELPER FUNCTIONS ---
 
 def main():
@@ -95,13 +119,18 @@ def main():
 
     default_values = {
         'criteria_processed_successfully': False, 'processed_criteria': {}, 'fetched_data_df': None,
-        'ui_company_search_query': "", 'ui_ticker_search_results_list_of_dicts': [],
+        'ui_company_search_query': "", 'ui_last_suggested_query': "", 'ui_ticker_search_results_list_of_dicts': [],
         'ui_selected_ticker_display_option': None, 'ui_selected_date_period': "1 Year",
         # Ensure default custom dates are datetime.date objects
         'ui_custom_start_date': (datetime.today() - timedelta(days=365)).date(),
         'ui_custom_end_date': datetime.today().date(),
         'ui_selected_data_type_label': "Historical Prices (OHLCV)",
-        'ui_selected_interval_label': "Daily"
+        'ui_selected_interval_label': "Daily",
+        'ui_batch_tickers_text': "", 'ui_batch_output_format': "Zip of CSVs (one per ticker)",
+        'batch_results': None, 'batch_failures': {}, 'batch_criteria': {},
+        'fetched_data_key': None, 'ui_export_format': "CSV",
+        'active_fetch_job_id': None, 'active_batch_job_id': None, 'pending_batch_criteria': {}, 'fetch_status_message': None,
+        'ui_indicator_selection': [], 'ui_sma_window': 20, 'ui_ema_span': 20, 'ui_vol_window': 20, 'ui_show_diagnostics': False
     }
     for key, value in default_values.items():
         if key not in st.session_state: st.session_state[key] = value
@@ -113,6 +142,10 @@ def main():
                 "Search Company Name or Ticker:", value=st.session_state.ui_company_search_query,
                 key="company_search_widget", placeholder="e.g., Apple or AAPL"
             )
+            if st.session_state.ui_company_search_query != st.session_state.ui_last_suggested_query:
+                st.session_state.ui_last_suggested_query = st.session_state.ui_company_search_query
+                st.session_state.ui_ticker_search_results_list_of_dicts = lookup_tickers_as_you_type(st.session_state.ui_company_search_query, result_count=25)
+                st.session_state.ui_selected_ticker_display_option = None
             if st.button("🔍 Search Tickers", key="search_ticker_btn", use_container_width=True):
                 if st.session_state.ui_company_search_query:
                     with st.spinner("Searching..."):
@@ -135,7 +168,7 @@ def main():
                 st.info("If direct ticker entry, ensure it's correct (e.g. AAPL, MSFT.MX)")
 
 
-            date_period_options = ["1 Year", "2 Years", "3 Years", "5 Years", "Max", "Custom Range"]
+            date_period_options = list(PERIOD_CODES)
             st.session_state.ui_selected_date_period = st.selectbox(
                 "🗓️ Select Date Period:", options=date_period_options,
                 index=date_period_options.index(st.session_state.ui_selected_date_period), key="date_period_widget"
@@ -157,7 +190,7 @@ def main():
                         key="custom_end_date_widget"
                     )
             # ... (Data Type and Interval Selectbox UI remains the same) ...
-            data_type_options_map = {"Historical Prices (OHLCV)": "1", "Dividends": "2", "Stock Splits": "3", "Capital Gains": "4"}
+            data_type_options_map = DATA_TYPE_CODES
             data_type_labels = list(data_type_options_map.keys()); default_dt_idx = 0
             try: default_dt_idx = data_type_labels.index(st.session_state.ui_selected_data_type_label)
             except ValueError: pass
@@ -194,90 +227,87 @@ def main():
                 else: valid_inputs = False
 
                 if valid_inputs: # Proceed only if ticker is resolved
-                    # Pass datetime.date objects directly for custom range
-                    s_yf, s_fn, e_yf, e_fn = get_date_range_from_period_keyword(
-                        st.session_state.ui_selected_date_period,
-                        custom_start_date_obj=st.session_state.ui_custom_start_date if st.session_state.ui_selected_date_period == "Custom Range" else None,
-                        custom_end_date_obj=st.session_state.ui_custom_end_date if st.session_state.ui_selected_date_period == "Custom Range" else None
-                    )
-                    if s_yf is None and st.session_state.ui_selected_date_period not in ["Max", "Custom Range"]:
-                        st.error("Date processing failed."); valid_inputs = False
-                    elif st.session_state.ui_selected_date_period == "Custom Range" and (s_yf is None or e_yf is None):
-                        # Error message is handled by get_date_range_from_period_keyword
-                        valid_inputs = False
-                    else: temp_criteria.update({'start_date_yf':s_yf, 'start_date_filename':s_fn, 'end_date_yf':e_yf, 'end_date_filename':e_fn})
-
-                if valid_inputs: # Proceed only if dates are also resolved
-                    temp_criteria['data_type_code'] = selected_data_type_code
-                    suffix_map = {'1': "historical_prices", '2': "dividends", '3': "stock_splits", '4': "capital_gains"}
-                    temp_criteria['base_file_description_suffix'] = suffix_map.get(selected_data_type_code, "data")
-                    if selected_data_type_code == "1" and selected_interval_code_ui:
-                        interval_map_yf = {'d': ('1d', "daily"), 'w': ('1wk', "weekly"), 'm': ('1mo', "monthly")}
-                        yf_interval, interval_desc = interval_map_yf[selected_interval_code_ui]
-                        temp_criteria.update({'interval_yf': yf_interval, 'interval_desc': interval_desc})
-                        temp_criteria['base_file_description_suffix'] = f"historical_prices_{interval_desc}"
-                    
-                    st.session_state.processed_criteria = temp_criteria
-                    st.session_state.criteria_processed_successfully = True
-                
+                    try:
+                        st.session_state.processed_criteria = resolve_criteria(
+                            actual_ticker_symbol, st.session_state.ui_selected_date_period, selected_data_type_code, selected_interval_code_ui,
+                            custom_start=st.session_state.ui_custom_start_date, custom_end=st.session_state.ui_custom_end_date
+                        )
+                        st.session_state.criteria_processed_successfully = True
+                    except CriteriaError as e: st.sidebar.error(str(e)); valid_inputs = False
+
                 if st.session_state.criteria_processed_successfully:
-                    crit = st.session_state.processed_criteria
-                    ticker_str = crit.get('ticker'); raw_fetched_data = None
-                    with st.spinner(f"Fetching data for {ticker_str}..."):
-                        try:
-                            ticker_obj = yf.Ticker(ticker_str)
-                            if crit.get('data_type_code') != "1" and not ticker_obj.info:
-                                 st.warning(f"Could not get company info for '{ticker_str}'.")
-                            
-                            if crit.get('data_type_code') == "1":
-                                end_date_exclusive_yf = (pd.to_datetime(crit.get('end_date_yf')) + timedelta(days=1)).strftime('%Y-%m-%d') if crit.get('end_date_yf') else None
-                                raw_fetched_data = yf.download(ticker_str, start=crit.get('start_date_yf'), end=end_date_exclusive_yf,
-                                                             interval=crit.get('interval_yf'), progress=False, timeout=20)
-                            elif crit.get('data_type_code') == "2": raw_fetched_data = ticker_obj.dividends
-                            elif crit.get('data_type_code') == "3": raw_fetched_data = ticker_obj.splits
-                            elif crit.get('data_type_code') == "4": raw_fetched_data = ticker_obj.capital_gains
-                            
-                            final_data_to_show = None
-                            if raw_fetched_data is not None and not raw_fetched_data.empty:
-                                if crit.get('data_type_code') == "1": final_data_to_show = raw_fetched_data
-                                else:
-                                    temp_data_filter = raw_fetched_data.copy(); s_yf_filter, e_yf_filter = crit.get('start_date_yf'), crit.get('end_date_yf')
-                                    if isinstance(temp_data_filter.index, pd.DatetimeIndex):
-                                        idx_naive = temp_data_filter.index.tz_localize(None).date if temp_data_filter.index.tz is not None else temp_data_filter.index.date
-                                        if s_yf_filter: temp_data_filter = temp_data_filter[idx_naive >= pd.to_datetime(s_yf_filter).date()]
-                                        if not temp_data_filter.empty and e_yf_filter:
-                                            idx_naive_end = temp_data_filter.index.tz_localize(None).date if temp_data_filter.index.tz is not None else temp_data_filter.index.date
-                                            temp_data_filter = temp_data_filter[idx_naive_end <= pd.to_datetime(e_yf_filter).date()]
-                                        final_data_to_show = temp_data_filter
-                                    elif isinstance(temp_data_filter, pd.DataFrame) and 'Date' in temp_data_filter.columns:
-                                        temp_data_filter['Date'] = pd.to_datetime(temp_data_filter['Date']).dt.tz_localize(None)
-                                        mask = pd.Series(True, index=temp_data_filter.index)
-                                        if s_yf_filter: mask &= (temp_data_filter['Date'] >= pd.to_datetime(s_yf_filter))
-                                        if e_yf_filter: mask &= (temp_data_filter['Date'] <= pd.to_datetime(e_yf_filter))
-                                        final_data_to_show = temp_data_filter.loc[mask]
-                                    else: final_data_to_show = raw_fetched_data
-                            
-                            if final_data_to_show is not None and not final_data_to_show.empty:
-                                if isinstance(final_data_to_show, pd.Series):
-                                    final_data_to_show = final_data_to_show.to_frame(name=crit.get("base_file_description_suffix", "Data"))
-                                st.session_state.fetched_data_df = final_data_to_show
-                                st.success("✅ Data fetched successfully!")
-                            elif final_data_to_show is not None and final_data_to_show.empty:
-                                st.info("ℹ️ No data found for the given criteria after filtering.")
-                            else: st.warning("⚠️ Could not fetch data or no data available from source.")
-                        except Exception as e: st.error(f"❌ Error during data fetching: {e}")
+                    # Runs in the background; the main page polls the job and picks up the result
+                    previous_job = JOB_MANAGER.get(st.session_state.active_fetch_job_id) if st.session_state.active_fetch_job_id else None
+                    if previous_job is not None: previous_job.cancel()
+                    st.session_state.active_fetch_job_id = submit_single_fetch(st.session_state.processed_criteria).id
+                    st.session_state.fetch_status_message = None
                 else:
                     if 'ticker' not in temp_criteria and not st.session_state.ui_company_search_query : st.error("Ticker selection is required.")
                     # else: st.warning("Could not fetch data as criteria setting failed. Please check inputs.") # Already handled by other errors
                 
                 st.rerun()
 
+        with st.expander("📦 **Batch Download (many tickers)**", expanded=False):
+            st.caption("Uses the date period, data type and interval chosen above.")
+            st.session_state.ui_batch_tickers_text = st.text_area(
+                "Tickers (comma, space or newline separated):", value=st.session_state.ui_batch_tickers_text,
+                key="batch_tickers_widget", placeholder="e.g., AAPL, MSFT, GOOG"
+            )
+            batch_file = st.file_uploader("...or upload a ticker list (.txt / .csv):", type=["txt", "csv"], key="batch_file_widget")
+            batch_format_options = ["Zip of CSVs (one per ticker)", "Combined long-format CSV"]
+            st.session_state.ui_batch_output_format = st.radio("Output:", options=batch_format_options,
+                index=batch_format_options.index(st.session_state.ui_batch_output_format), key="batch_format_widget")
+            batch_workers = st.slider("Parallel workers:", min_value=1, max_value=16, value=8, key="batch_workers_widget")
+
+            if st.button("📦 Fetch Batch", key="batch_fetch_button", use_container_width=True):
+                batch_tickers = parse_ticker_list(st.session_state.ui_batch_tickers_text)
+                if batch_file is not None:
+                    batch_tickers += [t for t in read_ticker_file(batch_file.getvalue(), batch_file.name) if t not in batch_tickers]
+                if not batch_tickers: st.warning("Please enter or upload at least one ticker.")
+                else:
+                    try:
+                        # Shared criteria for the whole batch; the ticker slot is filled per symbol
+                        batch_criteria = resolve_criteria("batch", st.session_state.ui_selected_date_period, selected_data_type_code, selected_interval_code_ui,
+                                                          custom_start=st.session_state.ui_custom_start_date, custom_end=st.session_state.ui_custom_end_date)
+                    except CriteriaError as e: st.sidebar.error(str(e)); batch_criteria = None
+                    if batch_criteria is not None:
+                        st.session_state.active_batch_job_id = submit_batch_fetch(batch_tickers, batch_criteria, max_workers=batch_workers).id
+                        st.session_state.pending_batch_criteria = dict(batch_criteria, output_format=st.session_state.ui_batch_output_format)
+                        st.rerun()
+
+        with st.expander("📐 **Analytics (optional)**", expanded=False):
+            st.caption("Indicator columns are computed on the Close price and included in previews and exports.")
+            st.session_state.ui_indicator_selection = st.multiselect("Indicators:", options=list(INDICATORS),
+                default=st.session_state.ui_indicator_selection, key="indicator_select_widget")
+            if "SMA" in st.session_state.ui_indicator_selection:
+                st.session_state.ui_sma_window = st.number_input("SMA window:", min_value=MIN_WINDOW, max_value=500, value=st.session_state.ui_sma_window, key="sma_window_widget")
+            if "EMA" in st.session_state.ui_indicator_selection:
+                st.session_state.ui_ema_span = st.number_input("EMA span:", min_value=MIN_WINDOW, max_value=500, value=st.session_state.ui_ema_span, key="ema_span_widget")
+            if "Rolling Volatility" in st.session_state.ui_indicator_selection:
+                st.session_state.ui_vol_window = st.number_input("Volatility window:", min_value=MIN_WINDOW, max_value=500, value=st.session_state.ui_vol_window, key="vol_window_widget")
+
+        render_export_format_selector()
+        with st.expander("🧠 Shared Data Cache", expanded=False):
+            cache_stats = DATA_CACHE.stats()
+            c1, c2 = st.columns(2)
+            with c1: st.metric(label="Hits", value=cache_stats['hits']); st.metric(label="Coalesced", value=cache_stats['coalesced'])
+            with c2: st.metric(label="Misses", value=cache_stats['misses']); st.metric(label="Evictions", value=cache_stats['evictions'])
+            st.caption(f"{cache_stats['entries']} entries · {cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB · {cache_stats['expired']} expired")
+        st.session_state.ui_show_diagnostics = st.toggle("🩺 Show diagnostics", value=st.session_state.ui_show_diagnostics, key="show_diagnostics_widget")
         st.markdown("---")
         if st.button("🔄 Reset All Inputs", key="reset_all_button_sidebar", use_container_width=True):
+            for job_key in ("active_fetch_job_id", "active_batch_job_id"):
+                # Cancel before forgetting them: an orphaned batch would keep holding one of the few batch workers
+                job = JOB_MANAGER.get(st.session_state[job_key]) if st.session_state[job_key] else None
+                if job is not None: job.cancel()
             for key_to_reset in default_values: st.session_state[key_to_reset] = default_values[key_to_reset]
             st.rerun()
 
     # --- Main Page Display ---
+    if st.session_state.active_fetch_job_id or st.session_state.active_batch_job_id: render_active_jobs()
+    if st.session_state.fetch_status_message:
+        message_kind, message_text = st.session_state.fetch_status_message
+        getattr(st, message_kind)(message_text)
     # ... (Main page display logic remains the same, showing criteria if set, and data preview/download if fetched) ...
     if not st.session_state.criteria_processed_successfully:
         st.info("👋 Welcome! Please set your data download criteria using the sidebar.")
@@ -294,18 +324,53 @@ def main():
 
         if st.session_state.fetched_data_df is not None and not st.session_state.fetched_data_df.empty:
             st.subheader("📄 Data Preview")
-            st.dataframe(st.session_state.fetched_data_df.head())
-            csv_data = st.session_state.fetched_data_df.to_csv(index=True).encode('utf-8')
-            crit_dl = st.session_state.processed_criteria
-            fn_company = sanitize_filename(crit_dl.get("ticker", "unknown")); fn_suffix = crit_dl.get("base_file_description_suffix", "data")
-            fn_start = crit_dl.get("start_date_filename", "inception"); fn_end = crit_dl.get("end_date_filename", "today")
-            file_name = f"{fn_company}_{fn_suffix}_{fn_start}_to_{fn_end}.csv"
-            file_name = re.sub(r'_+', '_', file_name).strip('_')
-            st.download_button(label="📥 Download Data as CSV", data=csv_data, file_name=file_name, mime='text/csv', key="download_csv_button", use_container_width=True)
+            crit_dl = st.session_state.processed_criteria; indicator_selections = current_indicator_selections()
+            # Memoized per (ticker, interval, indicator, params); new bars only extend the cached tail
+            export_df = add_indicators(st.session_state.fetched_data_df, indicator_selections,
+                                       cache_key=(crit_dl.get('ticker'), crit_dl.get('interval_yf') or "1d"), interval=crit_dl.get('interval_yf'))
+            st.dataframe(export_df.head())
+            if 'Close' in st.session_state.fetched_data_df.columns: render_price_chart(st.session_state.fetched_data_df)
+            export_format = st.session_state.ui_export_format
+            # The callable only runs when the button is clicked; the encoded file is memoized per dataset/format
+            export_key = f"{st.session_state.fetched_data_key}|{indicator_selections}"
+            st.download_button(label=f"📥 Download Data as {export_format}", data=lambda: export_bytes(export_df, export_format, dataset_key=export_key),
+                               file_name=build_file_name(crit_dl, export_format), mime=EXPORT_FORMATS[export_format][1],
+                               key="download_csv_button", use_container_width=True)
         elif st.session_state.criteria_processed_successfully: # Criteria were set, but fetch might have failed or found no data
              st.caption("_Data will appear here after successful fetching, or an error/info message if issues occur._")
 
 
+    if st.session_state.batch_results is not None:
+        st.markdown("---")
+        st.subheader("📦 Batch Results")
+        batch_results, batch_failures, batch_crit = st.session_state.batch_results, st.session_state.batch_failures, st.session_state.batch_criteria
+        col1, col2 = st.columns(2)
+        with col1: st.metric(label="Succeeded", value=len(batch_results))
+        with col2: st.metric(label="Failed", value=len(batch_failures))
+        if batch_failures:
+            with st.expander(f"⚠️ {len(batch_failures)} ticker(s) failed"):
+                st.dataframe(pd.DataFrame({"Ticker": list(batch_failures), "Error": list(batch_failures.values())}), hide_index=True)
+        if batch_results:
+            indicator_selections = current_indicator_selections()
+            # Indicator columns are only computed when a download is actually requested, once per dataset/format
+            batch_for_export = lambda: add_indicators_to_batch(batch_results, indicator_selections, batch_crit.get('interval_yf')) if indicator_selections else batch_results
+            export_format = st.session_state.ui_export_format; batch_key = f"{batch_crit.get('dataset_key')}|{indicator_selections}"
+            if batch_crit.get("output_format", "").startswith("Zip"):
+                member_name = lambda company: build_file_name(batch_crit, export_format, company=company)
+                st.download_button(label=f"📥 Download Batch as ZIP ({export_format})",
+                                   data=lambda: cached_export((batch_key, "zip", export_format), lambda: batch_to_zip_bytes(batch_for_export(), member_name, batch_failures, fmt=export_format)),
+                                   file_name=build_file_name(batch_crit, "CSV").replace(".csv", ".zip"), mime='application/zip',
+                                   key="download_batch_button", use_container_width=True)
+            else:
+                st.download_button(label=f"📥 Download Batch as {export_format}",
+                                   data=lambda: cached_export((batch_key, export_format, False), lambda: export_bytes(batch_to_long_frame(batch_for_export()), export_format, index=False)),
+                                   file_name=build_file_name(batch_crit, export_format), mime=EXPORT_FORMATS[export_format][1],
+                                   key="download_batch_button", use_container_width=True)
+
+    if st.session_state.ui_show_diagnostics:
+        st.markdown("---")
+        render_diagnostics_panel()
+
     st.markdown("---")
     st.caption("Built with [Streamlit](https://streamlit.io) & [yfinance](https://pypi.org/project/yfinance/) by Aarush")
 
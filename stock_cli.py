@@ -0,0 +1,94 @@
+"""Headless command-line front end for the fetch engine, e.g. for nightly bulk refreshes:
+
+    python stock_cli.py AAPL MSFT --period "5 Years" --interval weekly --format Parquet --out-dir data/
+    python stock_cli.py --tickers-file sp500.csv --period Max --combined --indicators "SMA:50,Drawdown"
+    python stock_cli.py AAPL --log-stages --metrics metrics.prom    # where did the time go?
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from batch_fetch import batch_to_long_frame, read_ticker_file, run_batch
+from data_export import EXPORT_FORMATS
+from fetch_engine import PERIOD_CODES, CriteriaError, export_result, resolve_criteria
+from indicators import add_indicators_to_batch, parse_indicator_spec
+from instrumentation import METRICS
+from yahoo_client import UPSTREAM_LIMITER
+
+DATA_TYPE_ARGS = {"prices": "1", "dividends": "2", "splits": "3", "capital-gains": "4"}
+INTERVAL_ARGS = {"daily": "d", "weekly": "w", "monthly": "m"}
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _positive_float(value):
+    if float(value) <= 0: raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return float(value)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Download Yahoo Finance data without the Streamlit UI.")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols, e.g. AAPL MSFT")
+    parser.add_argument("--tickers-file", help="Text or CSV file with one ticker per line / a Symbol column")
+    parser.add_argument("--period", default="1 Year", choices=list(PERIOD_CODES), help="Date period (default: 1 Year)")
+    parser.add_argument("--start", type=_parse_date, help="Start date YYYY-MM-DD (implies --period 'Custom Range')")
+    parser.add_argument("--end", type=_parse_date, help="End date YYYY-MM-DD (default: today); without --start, --period counts back from it")
+    parser.add_argument("--data-type", default="prices", choices=list(DATA_TYPE_ARGS))
+    parser.add_argument("--interval", default="daily", choices=list(INTERVAL_ARGS))
+    parser.add_argument("--format", default="CSV", choices=list(EXPORT_FORMATS), help="Output file format")
+    parser.add_argument("--out-dir", default=".", help="Directory to write files into")
+    parser.add_argument("--combined", action="store_true", help="Write one long-format file with a Ticker column")
+    parser.add_argument("--indicators", default="", help="Indicator columns to add, e.g. 'SMA:50,EMA:12,Drawdown'")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel download workers")
+    parser.add_argument("--rate", type=_positive_float, help="Max upstream requests per second (default: $STOCK_APP_YAHOO_RATE or 4)")
+    parser.add_argument("--log-stages", action="store_true", help="Log one JSON line per pipeline stage to stderr")
+    parser.add_argument("--metrics", help="Write per-stage timings in Prometheus text format to this file ('-' = stderr)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.log_stages:
+        handler = logging.StreamHandler(sys.stderr); handler.setFormatter(logging.Formatter("%(message)s"))
+        metrics_logger = logging.getLogger("stock_app.metrics"); metrics_logger.addHandler(handler); metrics_logger.setLevel(logging.INFO)
+    tickers = [t.upper() for t in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file, "rb") as fh:
+            tickers += [t for t in read_ticker_file(fh.read(), args.tickers_file) if t not in tickers]
+    if not tickers:
+        print("error: no tickers given", file=sys.stderr); return 2
+
+    period = "Custom Range" if args.start else args.period
+    try:
+        criteria = resolve_criteria("batch", period, DATA_TYPE_ARGS[args.data_type], INTERVAL_ARGS[args.interval],
+                                    custom_start=args.start, custom_end=args.end or datetime.today().date(), period_end=args.end)
+    except CriteriaError as e:
+        print(f"error: {e}", file=sys.stderr); return 2
+
+    try: indicator_selections = parse_indicator_spec(args.indicators)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr); return 2
+
+    def report(done, total, ticker, error):
+        print(f"[{done}/{total}] {ticker}: {'FAILED ' + error if error else 'ok'}", file=sys.stderr)
+
+    if args.rate is not None: UPSTREAM_LIMITER.set_rate(args.rate)
+    results, failures = run_batch(tickers, criteria, max_workers=args.workers, on_progress=report)
+    if indicator_selections: results = add_indicators_to_batch(results, indicator_selections, criteria.get('interval_yf'))
+    if args.combined and results:
+        print(export_result(batch_to_long_frame(results), criteria, args.out_dir, args.format, company="batch", index=False))
+    else:
+        for ticker, df in results.items(): print(export_result(df, criteria, args.out_dir, args.format, company=ticker))
+    if failures:
+        print(f"{len(failures)} of {len(tickers)} ticker(s) failed: {', '.join(failures)}", file=sys.stderr)
+    if args.metrics == "-": sys.stderr.write(METRICS.prometheus_text())
+    elif args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as fh: fh.write(METRICS.prometheus_text())
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Locally built weekly/monthly bars vs recorded reference bars (tests/fixtures).
+
+Re-record the fixtures from Yahoo (needs network access) with:
+
+    python benchmarks/record_fixtures.py AAPL KO --start 2023-01-01 --end 2024-12-31 --out-dir tests/fixtures
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+import pandas as pd
+
+from ohlcv_resample import apply_auto_adjust, resample_ohlcv
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PRICE_RTOL = 1e-4  # Yahoo rounds adjusted prices; a hundredth of a cent on $100 is still an exact match
+
+with open(os.path.join(FIXTURE_DIR, "manifest.json"), "r", encoding="utf-8") as fh: MANIFEST = json.load(fh)
+CASES = [(ticker, interval) for ticker in MANIFEST["tickers"] for interval in ("1wk", "1mo")]
+
+
+def _fixture(ticker, kind):
+    return pd.read_parquet(os.path.join(FIXTURE_DIR, f"{ticker}.{kind}.parquet"))
+
+
+def _interior(ours, expected):
+    # The first and last bars can be partial (recording window edges, a still-open bar)
+    lo, hi = max(ours.index[0], expected.index[0]), min(ours.index[-1], expected.index[-1])
+    return ours.loc[lo:hi].iloc[1:-1], expected.loc[lo:hi].iloc[1:-1]
+
+
+@pytest.mark.parametrize("ticker,interval", CASES)
+def test_bar_labels_match(ticker, interval):
+    ours, expected = _interior(apply_auto_adjust(resample_ohlcv(_fixture(ticker, "daily"), interval)), _fixture(ticker, interval))
+    assert len(expected) > 0
+    pd.testing.assert_index_equal(ours.index, expected.index, check_names=False)
+
+
+@pytest.mark.parametrize("ticker,interval", CASES)
+def test_ohlcv_values_match(ticker, interval):
+    ours, expected = _interior(apply_auto_adjust(resample_ohlcv(_fixture(ticker, "daily"), interval)), _fixture(ticker, interval))
+    for col in ("Open", "High", "Low", "Close"):
+        np.testing.assert_allclose(ours[col].to_numpy(np.float64), expected[col].to_numpy(np.float64), rtol=PRICE_RTOL, err_msg=f"{ticker} {interval} {col}")
+    np.testing.assert_array_equal(ours["Volume"].to_numpy(np.int64), expected["Volume"].to_numpy(np.int64), err_msg=f"{ticker} {interval} Volume")
+
+
+def test_reference_bars_are_yahoos():
+    # Parity with Yahoo is only proven by bars recorded from Yahoo; say so instead of passing silently
+    if MANIFEST.get("reference_bars") != "yahoo":
+        pytest.skip(f"Yahoo parity unverified: fixtures are {MANIFEST['source']} with {MANIFEST.get('reference_bars')} reference bars; "
+                    "re-record them with benchmarks/record_fixtures.py (see module docstring)")
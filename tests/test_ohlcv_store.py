@@ -0,0 +1,90 @@
+"""Gap detection and merging in the local OHLCV store, with a scripted upstream via the downloader hook."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import ohlcv_store
+from ohlcv_store import _fetch_daily, load_store_entry
+
+YEAR_END = pd.Timestamp("2025-01-01")  # Exclusive end of every 2024 request
+
+
+def _bars(start="2024-01-01", end="2024-12-31", close=100.0, volume=1000, freq="B"):
+    idx = pd.date_range(start, end, freq=freq, name="Date")
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Adj Close": close,
+                         "Volume": volume}, index=idx)
+
+
+class FakeYahoo:
+    # Same contract as ohlcv_store._download_range: bars in [start, end), start None = inception
+    def __init__(self, frame):
+        self.frame, self.calls = frame, []
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((start, end))
+        return self.frame.loc[start:end - pd.Timedelta(1, "ns")].copy()
+
+
+def _assert_bars(actual, expected):
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_freq=False)
+
+
+def test_cold_fetch_downloads_once_then_serves_from_disk(tmp_path):
+    upstream = FakeYahoo(_bars())
+    first = _fetch_daily("X", pd.Timestamp("2024-03-01"), YEAR_END, tmp_path, upstream)
+    again = _fetch_daily("X", pd.Timestamp("2024-06-01"), pd.Timestamp("2024-09-01"), tmp_path, upstream)
+    assert upstream.calls == [(pd.Timestamp("2024-03-01"), YEAR_END)]
+    _assert_bars(first, _bars("2024-03-01"))
+    _assert_bars(again, _bars("2024-06-01", "2024-08-31"))
+
+
+def test_tail_gap_redownloads_from_last_stored_bar(tmp_path):
+    upstream = FakeYahoo(_bars())
+    _fetch_daily("X", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-07-01"), tmp_path, upstream)
+    result = _fetch_daily("X", pd.Timestamp("2024-01-01"), YEAR_END, tmp_path, upstream)
+    assert upstream.calls[-1] == (pd.Timestamp("2024-06-28"), YEAR_END)  # Last stored bar, a Friday
+    _assert_bars(result, _bars())
+
+
+def test_head_gap_redownloads_through_first_stored_bar(tmp_path):
+    upstream = FakeYahoo(_bars())
+    _fetch_daily("X", pd.Timestamp("2024-07-01"), YEAR_END, tmp_path, upstream)
+    result = _fetch_daily("X", pd.Timestamp("2024-01-01"), YEAR_END, tmp_path, upstream)
+    assert upstream.calls[-1] == (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-07-02"))
+    _assert_bars(result, _bars())
+    stored, meta = load_store_entry("X", "1d", tmp_path)
+    _assert_bars(stored, _bars())
+    assert (meta["start"], meta["end"]) == ("2024-01-01", "2025-01-01")
+
+
+def test_head_gap_after_split_rescales_stored_rows(tmp_path):
+    upstream = FakeYahoo(_bars())
+    _fetch_daily("X", pd.Timestamp("2024-07-01"), YEAR_END, tmp_path, upstream)
+    upstream.frame = _bars(close=50.0, volume=2000)  # 2:1 split, Yahoo restates the whole history
+    result = _fetch_daily("X", pd.Timestamp("2024-01-01"), YEAR_END, tmp_path, upstream)
+    _assert_bars(result, upstream.frame)
+    _assert_bars(load_store_entry("X", "1d", tmp_path)[0], upstream.frame)
+
+
+def test_tail_gap_after_dividend_rescales_adj_close(tmp_path):
+    upstream = FakeYahoo(_bars())
+    _fetch_daily("X", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-07-01"), tmp_path, upstream)
+    upstream.frame = _bars().assign(**{"Adj Close": 98.0})  # A dividend lowers every earlier Adj Close
+    result = _fetch_daily("X", pd.Timestamp("2024-01-01"), YEAR_END, tmp_path, upstream)
+    _assert_bars(result, upstream.frame)
+
+
+def test_live_bar_is_refreshed_once_stale(tmp_path, monkeypatch):
+    today = pd.Timestamp(datetime.today().date())
+    upstream = FakeYahoo(_bars(today - timedelta(days=10), today, freq="D"))
+    req_start, req_end = today - timedelta(days=10), today + timedelta(days=1)
+    _fetch_daily("X", req_start, req_end, tmp_path, upstream)
+    _fetch_daily("X", req_start, req_end, tmp_path, upstream)
+    assert len(upstream.calls) == 1  # Today's bar is still fresh
+
+    upstream.frame.loc[today, ["High", "Close", "Adj Close"]] = 101.0
+    monkeypatch.setattr(ohlcv_store, "LIVE_BAR_TTL_SECONDS", -1)
+    result = _fetch_daily("X", req_start, req_end, tmp_path, upstream)
+    assert upstream.calls[-1] == (today - timedelta(days=1), req_end)
+    assert result.loc[today, "Close"] == 101.0
+    assert result.loc[today - timedelta(days=1), "Close"] == 100.0
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_utils import TTLCache, atomic_write
+from instrumentation import stage
+
+# --- TICKER SEARCH ---
+# One keep-alive session for the whole process, a TTL-bounded LRU of raw search
+# responses, and an in-memory prefix/trigram index of every symbol we have ever been
+# shown, so as-you-type lookups are answered locally and only misses go to Yahoo.
+
+SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+SEARCH_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; StreamlitStockApp/1.0)'}
+INDEX_PATH = os.environ.get("STOCK_APP_TICKER_INDEX", os.path.join(os.path.expanduser("~"), ".stock_app_cache", "ticker_index.json"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(SEARCH_HEADERS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            _session.mount("https://", adapter); _session.mount("http://", adapter)
+        return _session
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TickerIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}  # symbol -> {'symbol', 'name', 'exchange'}
+        self._prefix = {}  # lowercase prefix of symbol/name word -> set(symbols), covers 1-2 char queries
+        self._grams = {}  # trigram -> set(symbols)
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as fh: self.add_many(json.load(fh), persist=False)
+            except (OSError, ValueError): pass
+
+    def __len__(self): return len(self._entries)
+
+    def _index_entry(self, entry):
+        sym = entry['symbol']
+        words = [sym.lower()] + entry['name'].lower().split()
+        for word in words:
+            for i in range(1, min(len(word), 12) + 1): self._prefix.setdefault(word[:i], set()).add(sym)
+        for gram in _trigrams(f"{sym} {entry['name']}".lower()): self._grams.setdefault(gram, set()).add(sym)
+
+    def add_many(self, entries, persist=True):
+        added = False
+        with self._lock:
+            for e in entries:
+                sym = e.get('symbol')
+                if not sym or sym in self._entries: continue
+                entry = {'symbol': sym, 'name': e.get('name', 'N/A'), 'exchange': e.get('exchange', 'N/A')}
+                self._entries[sym] = entry; self._index_entry(entry); added = True
+            if added and persist and self.path: self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, lambda fh: json.dump(list(self._entries.values()), fh), mode="w")
+
+    def query(self, text, limit=20):
+        q = (text or "").strip().lower()
+        if not q: return []
+        with self._lock:
+            candidates = set(self._prefix.get(q, ()))
+            if len(q) >= 3:
+                grams = [self._grams.get(g, set()) for g in _trigrams(q)]  # Substring match anywhere in symbol/name
+                if grams and all(grams): candidates |= set.intersection(*grams)
+            hits = [self._entries[s] for s in candidates]
+
+        def rank(e):
+            sym, name = e['symbol'].lower(), e['name'].lower()
+            if sym == q: return (0, sym)
+            if sym.startswith(q): return (1, sym)
+            if name.startswith(q): return (2, sym)
+            return (3, sym) if q in f"{sym} {name}" else (4, sym)
+        return [e for e in sorted(hits, key=rank) if rank(e)[0] < 4][:limit]
+
+
+_response_cache = TTLCache()
+_ticker_index = None
+_ticker_index_lock = threading.Lock()
+
+
+def get_ticker_index():
+    global _ticker_index
+    with _ticker_index_lock:
+        if _ticker_index is None: _ticker_index = TickerIndex(INDEX_PATH)
+        return _ticker_index
+
+
+def format_search_result(entry):
+    return {'display': f"{entry['symbol']} - {entry['name']} ({entry['exchange']})", 'symbol': entry['symbol']}
+
+
+def fetch_search_results(search_query, result_count=20):
+    """Query Yahoo's search endpoint (or the response cache). Raises requests/ValueError on failure."""
+    cache_key = (search_query.strip().lower(), result_count)
+    cached = _response_cache.get(cache_key)
+    if cached is not None: return cached
+    with stage("ticker_search") as rec:
+        response = get_http_session().get(SEARCH_URL, params={'q': search_query, 'count': result_count}, timeout=10)
+        response.raise_for_status()
+        entries = []
+        for item in response.json().get('quotes', []):
+            name = item.get('longname', item.get('shortname', 'N/A')); symbol = item.get('symbol', 'N/A')
+            exchange = item.get('exchDisp', item.get('exchange', 'N/A'))
+            if symbol != 'N/A' and name != 'N/A': entries.append({'symbol': symbol, 'name': name, 'exchange': exchange})
+        rec["rows"], rec["bytes"] = len(entries), len(response.content)
+    get_ticker_index().add_many(entries)
+    results = [format_search_result(e) for e in entries]
+    _response_cache.set(cache_key, results)
+    return results
+
+
+def suggest_tickers(search_query, limit=20):
+    """Instant, network-free suggestions from every symbol seen so far."""
+    return [format_search_result(e) for e in get_ticker_index().query(search_query, limit=limit)]
+# --- END OF TICKER SEARCH ---
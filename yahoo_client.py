@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+import yfinance.base as yf_base
+from yfinance.exceptions import YFTickerMissingError
+
+# --- YAHOO CLIENT ---
+# Every price/actions request to Yahoo goes through here. One process-wide token bucket
+# keeps all batches, sessions and background jobs together under the upstream rate limit,
+# and transient failures (timeouts, rate limits, outages) raise instead of quietly coming
+# back as an empty frame, so callers can tell them apart from "no data" and retry.
+
+# Raise instead of logging and returning an empty frame. This also covers the timezone lookup
+# yfinance runs before a ticker's first history request, which otherwise turns a timeout into
+# YFTzMissingError; with it off, a missing timezone means Yahoo answered and named none.
+yf.config.debug.hide_exceptions = False
+# ...and then yfinance asks the heavy Ticker.info endpoint as well (twice per process); an unknown
+# ticker does not need a second opinion
+yf_base._tz_info_fetch_ctr = 2
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, capacity=None):
+        if rate_per_sec <= 0: raise ValueError(f"Rate must be greater than 0, got {rate_per_sec}")
+        self.rate = float(rate_per_sec)
+        self.capacity = float(capacity or max(1.0, rate_per_sec))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate_per_sec):
+        if rate_per_sec <= 0: raise ValueError(f"Rate must be greater than 0, got {rate_per_sec}")
+        with self._lock: self.rate = float(rate_per_sec); self.capacity = max(1.0, self.rate); self._tokens = min(self._tokens, self.capacity)
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+UPSTREAM_LIMITER = TokenBucket(float(os.environ.get("STOCK_APP_YAHOO_RATE", "4")))
+
+
+def fetch_history(ticker, **history_kwargs):
+    """yf.Ticker(ticker).history(...) behind the shared rate limit. A ticker/range Yahoo has no data
+    for returns an empty frame; anything else (network, rate limit, outage) raises."""
+    UPSTREAM_LIMITER.acquire()
+    try: return yf.Ticker(ticker).history(**history_kwargs)
+    except YFTickerMissingError: return pd.DataFrame()  # Yahoo answered: unknown/delisted ticker, no bars in range
+# --- END OF YAHOO CLIENT ---